@@ -3,6 +3,7 @@
 Анализирует данные и генерирует персонализированные инсайты.
 """
 
+import html
 import logging
 import pandas as pd
 import numpy as np
@@ -586,9 +587,9 @@ def _format_insights_section(insights_result: Dict[str, Any]) -> str:
         str: отформатированная секция инсайтов
     """
     if insights_result['status'] == 'success' and insights_result['insights']:
-        section = "*Обнаруженные закономерности:*\n"
+        section = "<b>Обнаруженные закономерности:</b>\n"
         for i, insight in enumerate(insights_result['insights'], 1):
-            section += f"{i}. {insight['message']}\n\n"
+            section += f"{i}. {html.escape(insight['message'])}\n\n"
         return section
     else:
         return "Пока не удалось обнаружить значимых закономерностей. Продолжайте добавлять записи для более точного анализа.\n\n"
@@ -612,17 +613,17 @@ def _format_correlations_section(corr_results: Dict[str, Any]) -> str:
     if not (correlations['positive'] or correlations['negative']):
         return ""
 
-    section = "*Основные факторы, влияющие на настроение:*\n"
+    section = "<b>Основные факторы, влияющие на настроение:</b>\n"
 
     # Положительные корреляции
     for corr in correlations['positive']:
         factor = get_russian_factor_name(corr['factor'])
-        section += f"✅ {factor.capitalize()} (+{corr['correlation']:.2f})\n"
+        section += f"✅ {html.escape(factor.capitalize())} (+{corr['correlation']:.2f})\n"
 
     # Отрицательные корреляции
     for corr in correlations['negative']:
         factor = get_russian_factor_name(corr['factor'])
-        section += f"❌ {factor.capitalize()} ({corr['correlation']:.2f})\n"
+        section += f"❌ {html.escape(factor.capitalize())} ({corr['correlation']:.2f})\n"
 
     section += "\n"
     return section
@@ -646,9 +647,9 @@ def _format_trends_section(trend_results: Dict[str, Any]) -> str:
     if not trends['weekly']['available']:
         return ""
 
-    section = "*Еженедельные паттерны:*\n"
-    section += f"Лучший день: {trends['weekly']['best_day']['day']} ({trends['weekly']['best_day']['value']:.1f}/10)\n"
-    section += f"Худший день: {trends['weekly']['worst_day']['day']} ({trends['weekly']['worst_day']['value']:.1f}/10)\n\n"
+    section = "<b>Еженедельные паттерны:</b>\n"
+    section += f"Лучший день: {html.escape(trends['weekly']['best_day']['day'])} ({trends['weekly']['best_day']['value']:.1f}/10)\n"
+    section += f"Худший день: {html.escape(trends['weekly']['worst_day']['day'])} ({trends['weekly']['worst_day']['value']:.1f}/10)\n\n"
 
     return section
 
@@ -656,6 +657,7 @@ def _format_trends_section(trend_results: Dict[str, Any]) -> str:
 def format_analytics_summary(entries: List[Dict[str, Any]]) -> str:
     """
     Форматирует сводку аналитики для отображения пользователю.
+    Результат размечен HTML (parse_mode=HTML), текст внутри экранирован.
 
     Args:
         entries: список записей пользователя
@@ -666,7 +668,7 @@ def format_analytics_summary(entries: List[Dict[str, Any]]) -> str:
     if not entries or len(entries) < 7:
         return "Недостаточно данных для аналитики. Продолжайте добавлять записи (нужно не менее 7)."
 
-    summary = "📊 *Аналитика паттернов и инсайты*\n\n"
+    summary = "📊 <b>Аналитика паттернов и инсайты</b>\n\n"
 
     # Генерация и форматирование инсайтов
     insights_result = generate_insights(entries)
@@ -10,9 +10,7 @@ from telegram.ext import Application
 
 from src.config import TELEGRAM_BOT_TOKEN
 from src.data.storage import initialize_storage
-from src.handlers import (
-    basic, entry, stats, notifications, sharing, visualization, import_csv, delete, analytics
-)
+from src.handlers import register_all, notifications
 
 # Настройка логгирования
 logger = logging.getLogger(__name__)
@@ -100,15 +98,7 @@ def create_application():
     application.post_shutdown = post_shutdown
 
     # Регистрация обработчиков
-    basic.register(application)
-    entry.register(application)
-    stats.register(application)
-    notifications.register(application)
-    sharing.register(application)
-    visualization.register(application)
-    import_csv.register(application)
-    delete.register(application)
-    analytics.register(application)
+    register_all(application)
 
     # Настройка планировщика для уведомлений
     if application.job_queue is None:
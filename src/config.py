@@ -54,6 +54,10 @@ else:
     SELECTING_TIMEZONE, TYPING_TIME
 ) = range(23)
 
+# Время бездействия в секундах, после которого незавершенный диалог
+# сбрасывается, а его данные освобождаются
+CONVERSATION_TIMEOUT = 600
+
 
 def initialize_environment():
     """
@@ -33,7 +33,10 @@ CACHE_TTL = 1800
 _entries_cache = {}
 _cache_lock = threading.RLock()
 
-# Соединение с базой данных (инициализируется при первом использовании)
+# Соединение с базой данных (инициализируется при первом использовании).
+# Соединение общее для всех потоков, поэтому каждый запрос и каждая транзакция
+# (execute ... commit/rollback) выполняются под _db_lock.
+# Порядок захвата блокировок: сначала _cache_lock, затем _db_lock.
 _db_connection = None
 _db_lock = threading.RLock()
 
@@ -53,7 +56,7 @@ def _get_db_connection() -> sqlite3.Connection:
             # Создаем директорию для данных, если её нет
             if not os.path.exists(DATA_FOLDER):
                 os.makedirs(DATA_FOLDER)
-                logger.info(f"Создана директория для данных: {DATA_FOLDER}")
+                logger.info("Создана директория для данных: %s", DATA_FOLDER)
 
             # Инициализируем соединение
             _db_connection = sqlite3.connect(DB_FILE, check_same_thread=False)
@@ -61,10 +64,19 @@ def _get_db_connection() -> sqlite3.Connection:
             # Включаем поддержку внешних ключей
             _db_connection.execute("PRAGMA foreign_keys = ON")
 
+            # WAL-журнал: читатели не блокируют писателя, а commit не требует
+            # двойного fsync. synchronous=NORMAL безопасен в режиме WAL.
+            _db_connection.executescript(
+                "PRAGMA journal_mode = WAL;"
+                "PRAGMA synchronous = NORMAL;"
+                "PRAGMA temp_store = MEMORY;"
+                "PRAGMA cache_size = -65536;"
+            )
+
             # Инициализируем таблицы, если их нет
             _initialize_db(_db_connection)
 
-            logger.info(f"Соединение с базой данных инициализировано: {DB_FILE}")
+            logger.info("Соединение с базой данных инициализировано: %s", DB_FILE)
 
         return _db_connection
 
@@ -99,8 +111,11 @@ def _initialize_db(conn: sqlite3.Connection) -> None:
     )
     ''')
 
-    # Создание индексов для ускорения запросов
-    conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_chat_id ON entries(chat_id)')
+    # Создание индексов для ускорения запросов.
+    # Выборки по chat_id (с фильтром и сортировкой по date) обслуживает составной
+    # индекс UNIQUE(chat_id, date), поэтому отдельный индекс по chat_id только
+    # добавляет лишнюю запись при каждой вставке — удаляем его.
+    conn.execute('DROP INDEX IF EXISTS idx_entries_chat_id')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date)')
 
     # ИСПРАВЛЕНИЕ: Добавляем индекс на notification_time для оптимизации запросов уведомлений
@@ -171,7 +186,7 @@ def _migrate_single_csv_file(csv_file: str, cursor: sqlite3.Cursor, conn: sqlite
 
     # Проверка, есть ли уже записи для этого пользователя в БД
     if _is_user_already_migrated(cursor, chat_id):
-        logger.info(f"Записи пользователя {chat_id} уже мигрированы в SQLite")
+        logger.info("Записи пользователя %s уже мигрированы в SQLite", chat_id)
         return
 
     # Создаем пользователя, если его нет (для foreign key constraint)
@@ -194,12 +209,12 @@ def _migrate_single_csv_file(csv_file: str, cursor: sqlite3.Cursor, conn: sqlite
     )
 
     conn.commit()
-    logger.info(f"Мигрировано {len(df)} записей пользователя {chat_id} из CSV в SQLite (batch operation)")
+    logger.info("Мигрировано %s записей пользователя %s из CSV в SQLite (batch operation)", len(df), chat_id)
 
     # Создаем резервную копию CSV-файла перед миграцией
     backup_path = csv_path + '.bak'
     os.rename(csv_path, backup_path)
-    logger.info(f"Создана резервная копия CSV-файла: {backup_path}")
+    logger.info("Создана резервная копия CSV-файла: %s", backup_path)
 
 
 def _migrate_csv_to_sqlite() -> None:
@@ -208,17 +223,18 @@ def _migrate_csv_to_sqlite() -> None:
     Выполняется при первом запуске после обновления.
     """
     conn = _get_db_connection()
-    cursor = conn.cursor()
 
     # Получение списка CSV-файлов пользователей
     csv_files = [f for f in os.listdir(DATA_FOLDER) if f.startswith('user_') and f.endswith('_data.csv')]
 
     for csv_file in csv_files:
-        try:
-            _migrate_single_csv_file(csv_file, cursor, conn)
-        except Exception as e:
-            logger.error(f"Ошибка при миграции CSV-файла {csv_file}: {e}")
-            conn.rollback()
+        with _db_lock:
+            cursor = conn.cursor()
+            try:
+                _migrate_single_csv_file(csv_file, cursor, conn)
+            except Exception as e:
+                logger.error("Ошибка при миграции CSV-файла %s: %s", csv_file, e)
+                conn.rollback()
 
     logger.info("Миграция данных из CSV в SQLite завершена")
 
@@ -258,60 +274,67 @@ def _cleanup_cache():
             del _entries_cache[chat_id]
 
     if expired_keys:
-        logger.debug(f"Очищено {len(expired_keys)} устаревших наборов данных из кеша")
+        logger.debug("Очищено %s устаревших наборов данных из кеша", len(expired_keys))
 
 
-def _flush_cache_to_db(chat_id: int) -> None:
+def _flush_cache_to_db(chat_id: int) -> bool:
     """
     Сохраняет кешированные данные в базу данных.
 
     Args:
         chat_id: ID пользователя в Telegram
+
+    Returns:
+        bool: False, если транзакция не удалась и данные остались только в кеше
     """
     with _cache_lock:
         if chat_id not in _entries_cache or not _entries_cache[chat_id].get("modified", False):
-            return
+            return True
 
         entries = _entries_cache[chat_id]["data"]
 
         # Нет изменений для сохранения
         if not entries:
             _entries_cache[chat_id]["modified"] = False
-            return
+            return True
 
-        conn = _get_db_connection()
-        cursor = conn.cursor()
+        # Шифрование всех записей заранее, чтобы выполнить UPSERT одним executemany
+        # и не держать блокировку БД во время шифрования
+        rows = [
+            (chat_id, entry['date'], encrypt_data(entry, chat_id))
+            for entry in entries
+        ]
 
-        try:
-            # Начинаем транзакцию
-            cursor.execute("BEGIN")
+        conn = _get_db_connection()
 
-            # Обновляем каждую запись
-            for entry in entries:
-                date = entry['date']
+        with _db_lock:
+            cursor = conn.cursor()
 
-                # Шифрование данных
-                encrypted_data = encrypt_data(entry, chat_id)
+            try:
+                # Начинаем транзакцию
+                cursor.execute("BEGIN")
 
-                # Обновление или вставка записи (UPSERT)
-                cursor.execute("""
+                # Обновление или вставка записей (UPSERT, batch operation)
+                cursor.executemany("""
                     INSERT INTO entries (chat_id, date, encrypted_data)
                     VALUES (?, ?, ?)
                     ON CONFLICT(chat_id, date)
                     DO UPDATE SET encrypted_data = excluded.encrypted_data
-                """, (chat_id, date, encrypted_data))
+                """, rows)
 
-            # Фиксируем транзакцию
-            conn.commit()
-
-            # Обновляем статус кеша
-            _entries_cache[chat_id]["modified"] = False
-            logger.debug(f"Данные пользователя {chat_id} сохранены в БД")
+                # Фиксируем транзакцию
+                conn.commit()
 
-        except Exception as e:
-            # Откатываем транзакцию в случае ошибки
-            conn.rollback()
-            logger.error(f"Ошибка при сохранении данных пользователя {chat_id}: {e}")
+            except Exception as e:
+                # Откатываем транзакцию в случае ошибки
+                conn.rollback()
+                logger.error("Ошибка при сохранении данных пользователя %s: %s", chat_id, e)
+                return False
+
+        # Обновляем статус кеша
+        _entries_cache[chat_id]["modified"] = False
+        logger.debug("Данные пользователя %s сохранены в БД", chat_id)
+        return True
 
 
 def save_data(data: Dict[str, Any], chat_id: int) -> bool:
@@ -326,9 +349,13 @@ def save_data(data: Dict[str, Any], chat_id: int) -> bool:
     Returns:
         bool: True, если данные успешно сохранены
     """
-    logger.debug(f"Сохранение данных для пользователя {chat_id}")
+    logger.debug("Сохранение данных для пользователя %s", chat_id)
 
     try:
+        # Обеспечиваем наличие пользователя в базе данных до любой записи в entries
+        # (FOREIGN KEY), в том числе до сброса кеша при превышении лимита
+        ensure_user_exists(chat_id)
+
         # Обновление кеша
         with _cache_lock:
             # Чистим устаревшие кеши перед добавлением новых данных
@@ -362,17 +389,15 @@ def save_data(data: Dict[str, Any], chat_id: int) -> bool:
             if len(_entries_cache) > MAX_CACHE_SIZE:
                 _flush_cache_to_db(chat_id)
 
-        # Обеспечиваем наличие пользователя в базе данных
-        ensure_user_exists(chat_id)
-
         # Немедленное сохранение в БД для важных данных
-        _flush_cache_to_db(chat_id)
+        if not _flush_cache_to_db(chat_id):
+            return False
 
-        logger.info(f"Данные успешно сохранены для пользователя {chat_id}")
+        logger.info("Данные успешно сохранены для пользователя %s", chat_id)
         return True
 
     except Exception as e:
-        logger.error(f"Ошибка при сохранении данных для пользователя {chat_id}: {e}")
+        logger.error("Ошибка при сохранении данных для пользователя %s: %s", chat_id, e)
         return False
 
 
@@ -389,7 +414,7 @@ def get_user_entries(chat_id: int, start_date: Optional[str] = None, end_date: O
     Returns:
         List[Dict[str, Any]]: список расшифрованных записей
     """
-    logger.debug(f"Получение записей пользователя {chat_id}")
+    logger.debug("Получение записей пользователя %s", chat_id)
 
     # Проверяем наличие данных в кеше
     with _cache_lock:
@@ -401,12 +426,11 @@ def get_user_entries(chat_id: int, start_date: Optional[str] = None, end_date: O
             if not start_date and not end_date:
                 # Обновляем временную метку
                 _entries_cache[chat_id]["timestamp"] = datetime.now()
-                logger.debug(f"Возвращено {len(cached_entries)} записей из кеша для пользователя {chat_id}")
+                logger.debug("Возвращено %s записей из кеша для пользователя %s", len(cached_entries), chat_id)
                 return cached_entries.copy()
 
     try:
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
         # Формирование запроса с учетом фильтров
         query = "SELECT date, encrypted_data FROM entries WHERE chat_id = ?"
@@ -424,8 +448,8 @@ def get_user_entries(chat_id: int, start_date: Optional[str] = None, end_date: O
         query += " ORDER BY date DESC"
 
         # Выполнение запроса
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        with _db_lock:
+            rows = conn.execute(query, params).fetchall()
 
         # Расшифровка записей
         decrypted_entries = []
@@ -435,9 +459,9 @@ def get_user_entries(chat_id: int, start_date: Optional[str] = None, end_date: O
                 if entry:
                     decrypted_entries.append(entry)
                 else:
-                    logger.warning(f"Не удалось расшифровать запись за {date} для пользователя {chat_id}")
+                    logger.warning("Не удалось расшифровать запись за %s для пользователя %s", date, chat_id)
             except Exception as e:
-                logger.error(f"Ошибка при расшифровке записи за {date}: {e}")
+                logger.error("Ошибка при расшифровке записи за %s: %s", date, e)
 
         # Если не было фильтрации, обновляем кеш
         if not start_date and not end_date:
@@ -448,11 +472,56 @@ def get_user_entries(chat_id: int, start_date: Optional[str] = None, end_date: O
                     "modified": False
                 }
 
-        logger.info(f"Успешно получено {len(decrypted_entries)} записей для пользователя {chat_id}")
+        logger.debug("Успешно получено %s записей для пользователя %s", len(decrypted_entries), chat_id)
+        return decrypted_entries
+
+    except Exception as e:
+        logger.error("Ошибка при получении записей для пользователя %s: %s", chat_id, e)
+        return []
+
+
+def get_recent_entries(chat_id: int, limit: int) -> List[Dict[str, Any]]:
+    """
+    Получает последние записи пользователя (от новых к старым).
+    Расшифровываются только возвращаемые записи.
+
+    Args:
+        chat_id: ID пользователя в Telegram
+        limit: максимальное количество записей
+
+    Returns:
+        List[Dict[str, Any]]: список расшифрованных записей
+    """
+    # Если все записи уже в кеше, расшифровка не нужна
+    with _cache_lock:
+        if chat_id in _entries_cache:
+            cached_entries = _entries_cache[chat_id]["data"]
+            return sorted(cached_entries, key=lambda entry: entry['date'], reverse=True)[:limit]
+
+    try:
+        conn = _get_db_connection()
+
+        with _db_lock:
+            rows = conn.execute(
+                "SELECT date, encrypted_data FROM entries WHERE chat_id = ? ORDER BY date DESC LIMIT ?",
+                (chat_id, limit)
+            ).fetchall()
+
+        decrypted_entries = []
+        for date, encrypted_data in rows:
+            try:
+                entry = decrypt_data(encrypted_data, chat_id)
+                if entry:
+                    decrypted_entries.append(entry)
+                else:
+                    logger.warning("Не удалось расшифровать запись за %s для пользователя %s", date, chat_id)
+            except Exception as e:
+                logger.error("Ошибка при расшифровке записи за %s: %s", date, e)
+
         return decrypted_entries
 
     except Exception as e:
-        logger.error(f"Ошибка при получении записей для пользователя {chat_id}: {e}")
+        logger.error("Ошибка при получении последних записей для пользователя %s: %s", chat_id, e)
         return []
 
 
@@ -466,7 +535,7 @@ def delete_all_entries(chat_id: int) -> bool:
     Returns:
         bool: True, если данные успешно удалены
     """
-    logger.info(f"Удаление всех записей пользователя {chat_id}")
+    logger.info("Удаление всех записей пользователя %s", chat_id)
 
     try:
         # Очистка кеша пользователя
@@ -476,18 +545,23 @@ def delete_all_entries(chat_id: int) -> bool:
 
         # Удаление записей из БД
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM entries WHERE chat_id = ?", (chat_id,))
-        conn.commit()
+        with _db_lock:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("DELETE FROM entries WHERE chat_id = ?", (chat_id,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
         rows_deleted = cursor.rowcount
-        logger.info(f"Удалено {rows_deleted} записей пользователя {chat_id}")
+        logger.info("Удалено %s записей пользователя %s", rows_deleted, chat_id)
 
         return True
 
     except Exception as e:
-        logger.error(f"Ошибка при удалении записей пользователя {chat_id}: {e}")
+        logger.error("Ошибка при удалении записей пользователя %s: %s", chat_id, e)
         return False
 
 
@@ -502,36 +576,45 @@ def delete_entry_by_date(chat_id: int, date: str) -> bool:
     Returns:
         bool: True, если запись успешно удалена
     """
-    logger.info(f"Удаление записи за {date} пользователя {chat_id}")
+    logger.info("Удаление записи за %s пользователя %s", date, chat_id)
 
     try:
         # Обновление кеша (если есть)
         with _cache_lock:
             if chat_id in _entries_cache:
                 entries = _entries_cache[chat_id]["data"]
-                # Удаляем запись из кеша
-                _entries_cache[chat_id]["data"] = [e for e in entries if e['date'] != date]
+                # Удаляем запись из кеша на месте, не пересобирая весь список
+                # (запись за дату уникальна, см. UNIQUE(chat_id, date))
+                for i, entry in enumerate(entries):
+                    if entry['date'] == date:
+                        del entries[i]
+                        break
                 _entries_cache[chat_id]["modified"] = True
                 _entries_cache[chat_id]["timestamp"] = datetime.now()
 
         # Удаление записи из БД
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM entries WHERE chat_id = ? AND date = ?", (chat_id, date))
-        conn.commit()
+        with _db_lock:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("DELETE FROM entries WHERE chat_id = ? AND date = ?", (chat_id, date))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
 
         success = cursor.rowcount > 0
 
         if success:
-            logger.info(f"Запись за {date} пользователя {chat_id} успешно удалена")
+            logger.info("Запись за %s пользователя %s успешно удалена", date, chat_id)
         else:
-            logger.info(f"Запись за {date} пользователя {chat_id} не найдена")
+            logger.info("Запись за %s пользователя %s не найдена", date, chat_id)
 
         return success
 
     except Exception as e:
-        logger.error(f"Ошибка при удалении записи за {date} пользователя {chat_id}: {e}")
+        logger.error("Ошибка при удалении записи за %s пользователя %s: %s", date, chat_id, e)
         return False
 
 
@@ -555,18 +638,45 @@ def has_entry_for_date(chat_id: int, date: str) -> bool:
 
     try:
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
-        cursor.execute("SELECT 1 FROM entries WHERE chat_id = ? AND date = ? LIMIT 1", (chat_id, date))
-        result = cursor.fetchone() is not None
+        with _db_lock:
+            row = conn.execute(
+                "SELECT 1 FROM entries WHERE chat_id = ? AND date = ? LIMIT 1", (chat_id, date)
+            ).fetchone()
 
-        return result
+        return row is not None
 
     except Exception as e:
-        logger.error(f"Ошибка при проверке записи за {date} пользователя {chat_id}: {e}")
+        logger.error("Ошибка при проверке записи за %s пользователя %s: %s", date, chat_id, e)
         return False
 
 
+def count_user_entries(chat_id: int) -> int:
+    """
+    Возвращает количество записей пользователя без их расшифровки.
+
+    Args:
+        chat_id: ID пользователя в Telegram
+
+    Returns:
+        int: количество записей
+    """
+    # Проверка в кеше
+    with _cache_lock:
+        if chat_id in _entries_cache:
+            return len(_entries_cache[chat_id]["data"])
+
+    try:
+        conn = _get_db_connection()
+
+        with _db_lock:
+            return conn.execute("SELECT COUNT(*) FROM entries WHERE chat_id = ?", (chat_id,)).fetchone()[0]
+
+    except Exception as e:
+        logger.error("Ошибка при подсчете записей пользователя %s: %s", chat_id, e)
+        return 0
+
+
 def ensure_user_exists(chat_id: int, username: Optional[str] = None, first_name: Optional[str] = None) -> None:
     """
     Убеждается, что пользователь существует в базе данных.
@@ -578,38 +688,39 @@ def ensure_user_exists(chat_id: int, username: Optional[str] = None, first_name:
         first_name: имя (опционально)
     """
     conn = _get_db_connection()
-    cursor = conn.cursor()
-
-    # Проверяем наличие пользователя
-    cursor.execute("SELECT 1 FROM users WHERE chat_id = ?", (chat_id,))
-    if cursor.fetchone() is None:
-        # Добавляем пользователя
-        cursor.execute(
-            "INSERT INTO users (chat_id, username, first_name) VALUES (?, ?, ?)",
-            (chat_id, username, first_name)
-        )
-        conn.commit()
-        logger.info(f"Создан новый пользователь с ID {chat_id}")
-    elif username is not None or first_name is not None:
-        # Обновляем данные существующего пользователя
-        update_fields = []
-        params = []
-
-        if username is not None:
-            update_fields.append("username = ?")
-            params.append(username)
 
-        if first_name is not None:
-            update_fields.append("first_name = ?")
-            params.append(first_name)
-
-        if update_fields:
-            query = f"UPDATE users SET {', '.join(update_fields)} WHERE chat_id = ?"
-            params.append(chat_id)
-
-            cursor.execute(query, params)
+    with _db_lock:
+        cursor = conn.cursor()
+        try:
+            if username is None and first_name is None:
+                # Только создание: существующего пользователя не трогаем
+                cursor.execute(
+                    "INSERT OR IGNORE INTO users (chat_id, username, first_name) VALUES (?, ?, ?)",
+                    (chat_id, username, first_name)
+                )
+                created = cursor.rowcount > 0
+            else:
+                # Создание или обновление одним запросом; переданные None
+                # не затирают сохраненные значения
+                cursor.execute(
+                    """
+                    INSERT INTO users (chat_id, username, first_name) VALUES (?, ?, ?)
+                    ON CONFLICT(chat_id) DO UPDATE SET
+                        username = COALESCE(excluded.username, username),
+                        first_name = COALESCE(excluded.first_name, first_name)
+                    """,
+                    (chat_id, username, first_name)
+                )
+                created = False
             conn.commit()
-            logger.debug(f"Обновлены данные пользователя {chat_id}")
+        except Exception:
+            conn.rollback()
+            raise
+
+    if created:
+        logger.info("Создан новый пользователь с ID %s", chat_id)
+    elif username is not None or first_name is not None:
+        logger.debug("Обновлены данные пользователя %s", chat_id)
 
 
 def save_user(chat_id: int, username: Optional[str], first_name: Optional[str], notification_time: Optional[str] = None) -> bool:
@@ -629,31 +740,35 @@ def save_user(chat_id: int, username: Optional[str], first_name: Optional[str],
     """
     try:
         conn = _get_db_connection()
-        cursor = conn.cursor()
-
-        # Проверяем, существует ли пользователь
-        cursor.execute("SELECT 1 FROM users WHERE chat_id = ?", (chat_id,))
-        if cursor.fetchone() is None:
-            # Добавляем нового пользователя
-            cursor.execute(
-                "INSERT INTO users (chat_id, username, first_name, notification_time) VALUES (?, ?, ?, ?)",
-                (chat_id, username, first_name, notification_time)
-            )
-        else:
-            # ИСПРАВЛЕНИЕ: Всегда обновляем notification_time, даже если она None
-            # Это позволяет корректно отключать уведомления
-            cursor.execute(
-                "UPDATE users SET username = ?, first_name = ?, notification_time = ? WHERE chat_id = ?",
-                (username, first_name, notification_time, chat_id)
-            )
 
-        conn.commit()
-        logger.info(f"Данные пользователя {chat_id} успешно сохранены (notification_time={notification_time})")
+        with _db_lock:
+            try:
+                # UPSERT вместо проверки и отдельной вставки: два одновременных
+                # /start не приводят к нарушению UNIQUE(chat_id).
+                # notification_time обновляется всегда, даже если она None —
+                # это позволяет корректно отключать уведомления
+                conn.execute(
+                    """
+                    INSERT INTO users (chat_id, username, first_name, notification_time)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(chat_id) DO UPDATE SET
+                        username = excluded.username,
+                        first_name = excluded.first_name,
+                        notification_time = excluded.notification_time
+                    """,
+                    (chat_id, username, first_name, notification_time)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        logger.info("Данные пользователя %s успешно сохранены (notification_time=%s)", chat_id, notification_time)
 
         return True
 
     except Exception as e:
-        logger.error(f"Ошибка при сохранении данных пользователя {chat_id}: {e}")
+        logger.error("Ошибка при сохранении данных пользователя %s: %s", chat_id, e)
         return False
 
 
@@ -670,16 +785,16 @@ def get_users_for_notification(current_time: str) -> List[Dict[str, Any]]:
     """
     try:
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT chat_id, username, first_name, notification_time FROM users WHERE notification_time = ?",
-            (current_time,)
-        )
+        with _db_lock:
+            rows = conn.execute(
+                "SELECT chat_id, username, first_name, notification_time FROM users WHERE notification_time = ?",
+                (current_time,)
+            ).fetchall()
 
         # Преобразование в список словарей
         users = []
-        for row in cursor.fetchall():
+        for row in rows:
             users.append({
                 'chat_id': row[0],
                 'username': row[1],
@@ -687,11 +802,11 @@ def get_users_for_notification(current_time: str) -> List[Dict[str, Any]]:
                 'notification_time': row[3]
             })
 
-        logger.info(f"Найдено {len(users)} пользователей для уведомления в {current_time}")
+        logger.info("Найдено %s пользователей для уведомления в %s", len(users), current_time)
         return users
 
     except Exception as e:
-        logger.error(f"Ошибка при получении пользователей для уведомления: {e}")
+        logger.error("Ошибка при получении пользователей для уведомления: %s", e)
         return []
 
 
@@ -704,15 +819,15 @@ def get_all_users_with_notifications() -> List[Dict[str, Any]]:
     """
     try:
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT chat_id, username, first_name, notification_time FROM users WHERE notification_time IS NOT NULL"
-        )
+        with _db_lock:
+            rows = conn.execute(
+                "SELECT chat_id, username, first_name, notification_time FROM users WHERE notification_time IS NOT NULL"
+            ).fetchall()
 
         # Преобразование в список словарей
         users = []
-        for row in cursor.fetchall():
+        for row in rows:
             users.append({
                 'chat_id': row[0],
                 'username': row[1],
@@ -720,11 +835,11 @@ def get_all_users_with_notifications() -> List[Dict[str, Any]]:
                 'notification_time': row[3]
             })
 
-        logger.info(f"Найдено {len(users)} пользователей с настроенными уведомлениями")
+        logger.info("Найдено %s пользователей с настроенными уведомлениями", len(users))
         return users
 
     except Exception as e:
-        logger.error(f"Ошибка при получении пользователей с уведомлениями: {e}")
+        logger.error("Ошибка при получении пользователей с уведомлениями: %s", e)
         return []
 
 
@@ -741,18 +856,18 @@ def get_entry_count_by_day(chat_id: int) -> Dict[str, int]:
     """
     try:
         conn = _get_db_connection()
-        cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT date, COUNT(*) FROM entries WHERE chat_id = ? GROUP BY date",
-            (chat_id,)
-        )
+        with _db_lock:
+            rows = conn.execute(
+                "SELECT date, COUNT(*) FROM entries WHERE chat_id = ? GROUP BY date",
+                (chat_id,)
+            ).fetchall()
 
-        date_counts = {row[0]: row[1] for row in cursor.fetchall()}
+        date_counts = {row[0]: row[1] for row in rows}
         return date_counts
 
     except Exception as e:
-        logger.error(f"Ошибка при получении статистики записей для пользователя {chat_id}: {e}")
+        logger.error("Ошибка при получении статистики записей для пользователя %s: %s", chat_id, e)
         return {}
 
 
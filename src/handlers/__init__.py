@@ -2,5 +2,31 @@
 Пакет для обработчиков команд и сообщений бота.
 """
 
-# Импорт подмодулей для упрощения общего импорта
-from src.handlers import basic, entry, stats, notifications, sharing, visualization, import_csv, delete, analytics
\ No newline at end of file
+import importlib
+
+# Подмодули обработчиков загружаются лениво (PEP 562): `src.handlers.basic`
+# импортируется только при первом обращении, поэтому импорт пакета не тянет
+# за собой pandas/matplotlib из неиспользуемых обработчиков
+__all__ = [
+    "basic", "entry", "stats", "notifications", "sharing",
+    "visualization", "import_csv", "delete", "analytics"
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def register_all(application):
+    """
+    Импортирует все модули обработчиков и регистрирует их в приложении.
+    Порядок регистрации совпадает с порядком в __all__: базовые обработчики
+    добавляются первыми.
+
+    Args:
+        application: экземпляр приложения бота
+    """
+    for name in __all__:
+        importlib.import_module(f"{__name__}.{name}").register(application)
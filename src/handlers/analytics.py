@@ -3,20 +3,103 @@
 Обрабатывает команды для анализа накопленных данных.
 """
 
+import asyncio
 import logging
+import time
+from typing import Any, Dict, List, Optional
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import (
     ContextTypes, CommandHandler, ConversationHandler
 )
 
-from src.utils.keyboards import MAIN_KEYBOARD
-from src.data.storage import get_user_entries
+from src.utils.keyboards import reply_main
+from src.data.storage import get_user_entries, count_user_entries
 from src.analytics.pattern_detection import format_analytics_summary
+from src.utils.formatters import NO_ENTRIES_MESSAGE
 
 # Настройка логгирования
 logger = logging.getLogger(__name__)
 
+# Состояние завершения диалога
+_END = ConversationHandler.END
+
+# Время жизни кеша результатов аналитики в секундах
+ANALYTICS_CACHE_TTL = 60
+
+# Кеш результатов аналитики
+# Структура: {chat_id: {"fingerprint": int, "text": str, "timestamp": float}}
+_analytics_cache: Dict[int, Dict[str, Any]] = {}
+
+
+async def _safe_delete(message) -> None:
+    """
+    Удаляет сообщение, логируя ошибку вместо ее проброса.
+
+    Args:
+        message: сообщение Telegram для удаления
+    """
+    try:
+        await message.delete()
+    except Exception as e:
+        logger.error("Не удалось удалить статусное сообщение: %s", e)
+
+
+def _delete_in_background(update: Update, context: ContextTypes.DEFAULT_TYPE, message) -> None:
+    """
+    Запускает удаление сообщения в фоне, не дожидаясь ответа Telegram.
+    Задача создается через приложение, которое хранит ссылку на нее
+    и передает непойманные исключения в обработчики ошибок.
+
+    Args:
+        update: объект с информацией о сообщении
+        context: контекст бота
+        message: сообщение Telegram для удаления
+    """
+    context.application.create_task(_safe_delete(message), update=update)
+
+
+def _entries_fingerprint(entries: List[Dict[str, Any]]) -> int:
+    """
+    Вычисляет отпечаток набора записей для проверки актуальности кеша.
+    Любое изменение записей (добавление, удаление, правка) меняет отпечаток.
+
+    Args:
+        entries: список записей пользователя
+
+    Returns:
+        int: отпечаток записей
+    """
+    return hash(repr(entries))
+
+
+def _get_cached_analytics(chat_id: int, fingerprint: int) -> Optional[str]:
+    """
+    Возвращает закешированный текст аналитики, если он актуален.
+    Попутно удаляет из кеша устаревшие результаты.
+
+    Args:
+        chat_id: ID пользователя в Telegram
+        fingerprint: отпечаток текущих записей пользователя
+
+    Returns:
+        Optional[str]: текст аналитики или None, если в кеше его нет
+    """
+    now = time.monotonic()
+
+    expired_keys = [
+        key for key, cached in _analytics_cache.items()
+        if now - cached["timestamp"] > ANALYTICS_CACHE_TTL
+    ]
+    for key in expired_keys:
+        del _analytics_cache[key]
+
+    cached = _analytics_cache.get(chat_id)
+    if cached is not None and cached["fingerprint"] == fingerprint:
+        return cached["text"]
+
+    return None
+
 
 async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -31,65 +114,68 @@ async def analytics_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         int: состояние ConversationHandler.END
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Пользователь {chat_id} запросил аналитику паттернов")
-    
+    logger.info("Пользователь %s запросил аналитику паттернов", chat_id)
+
+    # Дешевая проверка без расшифровки: при пустом дневнике отвечаем сразу,
+    # не отправляя промежуточное сообщение
+    if await asyncio.to_thread(count_user_entries, chat_id) == 0:
+        await reply_main(update.message, NO_ENTRIES_MESSAGE)
+        return _END
+
     # Отправка промежуточного сообщения
     status_message = await update.message.reply_text(
         "Анализирую данные... Это может занять несколько секунд."
     )
     
-    # Получение записей пользователя
-    entries = get_user_entries(chat_id)
+    # Получение записей пользователя (расшифровка — в отдельном потоке,
+    # чтобы не блокировать цикл событий)
+    entries = await asyncio.to_thread(get_user_entries, chat_id)
     
     if not entries:
-        # Если нет данных, удаляем статусное сообщение и отвечаем
-        try:
-            await status_message.delete()
-        except Exception as e:
-            logger.error(f"Не удалось удалить статусное сообщение: {e}")
-
-        await update.message.reply_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
-            reply_markup=MAIN_KEYBOARD
-        )
-        return ConversationHandler.END
-
-    try:
-        # Форматирование результатов аналитики
-        analytics_text = format_analytics_summary(entries)
+        # Записи есть, но ни одну не удалось расшифровать: удаляем статусное
+        # сообщение в фоне и сразу отвечаем
+        _delete_in_background(update, context, status_message)
 
-        # Удаление промежуточного сообщения
-        try:
-            await status_message.delete()
-        except Exception as e:
-            logger.error(f"Не удалось удалить статусное сообщение: {e}")
+        await reply_main(update.message, NO_ENTRIES_MESSAGE)
+        return _END
 
-        # Отправка результатов аналитики
-        await update.message.reply_text(
+    try:
+        fingerprint = _entries_fingerprint(entries)
+        analytics_text = _get_cached_analytics(chat_id, fingerprint)
+
+        if analytics_text is None:
+            # Форматирование результатов аналитики (pandas/numpy — в отдельном потоке)
+            analytics_text = await asyncio.to_thread(format_analytics_summary, entries)
+            _analytics_cache[chat_id] = {
+                "fingerprint": fingerprint,
+                "text": analytics_text,
+                "timestamp": time.monotonic()
+            }
+        else:
+            logger.debug("Аналитика пользователя %s взята из кеша", chat_id)
+
+        # Заменяем промежуточное сообщение результатами аналитики: одно
+        # редактирование вместо удаления и отправки нового сообщения.
+        # MAIN_KEYBOARD постоянная и уже показана, поэтому здесь не передается
+        # (edit_text не принимает ReplyKeyboardMarkup)
+        await status_message.edit_text(
             analytics_text,
-            parse_mode=ParseMode.MARKDOWN,
-            reply_markup=MAIN_KEYBOARD
+            parse_mode=ParseMode.HTML
         )
 
         # Явно очищаем пользовательские данные после завершения
         if 'analytics_data' in context.user_data:
             del context.user_data['analytics_data']
 
-        logger.info(f"Успешно отправлена аналитика пользователю {chat_id}")
+        logger.info("Успешно отправлена аналитика пользователю %s", chat_id)
     except Exception as e:
-        logger.error(f"Ошибка при анализе данных: {e}")
+        logger.error("Ошибка при анализе данных: %s", e)
 
-        try:
-            await status_message.delete()
-        except Exception:
-            pass
+        _delete_in_background(update, context, status_message)
 
-        await update.message.reply_text(
-            f"Произошла ошибка при анализе данных: {str(e)}",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, f"Произошла ошибка при анализе данных: {str(e)}")
 
-    return ConversationHandler.END
+    return _END
 
 
 def register(application):
@@ -99,6 +185,8 @@ def register(application):
     Args:
         application: экземпляр приложения бота
     """
-    application.add_handler(CommandHandler("analytics", analytics_command))
+    # block=False: тяжелый анализ выполняется отдельной задачей и не задерживает
+    # обработку обновлений других пользователей
+    application.add_handler(CommandHandler("analytics", analytics_command, block=False))
 
     logger.info("Обработчики аналитики зарегистрированы")
\ No newline at end of file
@@ -2,59 +2,215 @@
 Модуль с базовыми обработчиками команд (/start, /help, /id).
 """
 
+import asyncio
 import logging
+import re
+import time
+from typing import Dict, Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, BotCommand
 from telegram.ext import ContextTypes, CommandHandler, ConversationHandler, CallbackQueryHandler
 
-from src.utils.keyboards import MAIN_KEYBOARD
-from src.data.storage import save_user, get_user_entries
-from src.utils.formatters import format_entry_list
-from src.utils.conversation_manager import end_all_conversations, dump_all_conversations, has_active_conversations
+from src.utils.keyboards import MAIN_KEYBOARD, reply_main
+from src.data.storage import save_user, get_recent_entries, count_user_entries
+from src.utils.formatters import format_entry_list, NO_ENTRIES_MESSAGE
+from src.utils.conversation_manager import end_all_conversations, dump_all_conversations
 
 # Настройка логгирования
 logger = logging.getLogger(__name__)
 
+# Состояние завершения диалога
+_END = ConversationHandler.END
+
 # Префикс для callback-данных, чтобы их было легко идентифицировать
 HELP_PREFIX = "help_"
 
+# Шаблон callback-данных справки; группа action содержит действие без префикса
+HELP_CALLBACK_PATTERN = re.compile(rf"^{HELP_PREFIX}(?P<action>.*)$")
+
+# Приветственное сообщение /start
+WELCOME_MESSAGE = (
+    "🌈 Добро пожаловать в Трекер Настроения! 🌈\n\n"
+    "Я помогу вам отслеживать ваше настроение и другие психологические показатели "
+    "с акцентом на приватности и безопасности ваших данных.\n\n"
+    "📊 Основные возможности:\n"
+    "• Ежедневная оценка настроения и других показателей\n"
+    "• Визуализация данных с помощью графиков\n"
+    "• Выявление паттернов и зависимостей\n"
+    "• Безопасное хранение с шифрованием\n"
+    "• Возможность обмена данными с другими пользователями\n\n"
+    "🔐 Безопасность: Ваши данные автоматически шифруются с использованием вашего "
+    "Telegram ID. Вам не нужно запоминать отдельный пароль.\n\n"
+    "Используйте /help для просмотра всех доступных команд или /add для "
+    "добавления первой записи. Я проведу вас через все шаги!"
+)
+
+# Заголовок главного меню справки
+HELP_HEADER = "🔍 Справка по командам\n\nВыберите категорию, чтобы узнать больше о доступных функциях:"
+
+# Клавиатуры справки создаются один раз при импорте и переиспользуются
+HELP_MAIN_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📝 Добавление данных", callback_data=f"{HELP_PREFIX}data_entry")],
+    [InlineKeyboardButton("📊 Аналитика и визуализация", callback_data=f"{HELP_PREFIX}analytics")],
+    [InlineKeyboardButton("🗂️ Управление данными", callback_data=f"{HELP_PREFIX}data_management")],
+    [InlineKeyboardButton("🔄 Обмен данными", callback_data=f"{HELP_PREFIX}sharing")],
+    [InlineKeyboardButton("⚙️ Настройки", callback_data=f"{HELP_PREFIX}settings")],
+    [InlineKeyboardButton("📋 Полный список команд", callback_data=f"{HELP_PREFIX}all")],
+    [InlineKeyboardButton("❌ Закрыть", callback_data=f"{HELP_PREFIX}close")]
+])
+
+HELP_BACK_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔙 Назад к категориям", callback_data=f"{HELP_PREFIX}back")],
+    [InlineKeyboardButton("❌ Закрыть", callback_data=f"{HELP_PREFIX}close")]
+])
+
+# Тексты справки по категориям
+HELP_CATEGORY_TEXTS = {
+    "data_entry": (
+        "📝 Добавление данных\n\n"
+        "• /add - добавить новую запись за сегодня (я проведу вас через все шаги)\n"
+        "• /add_date - добавить запись за другую дату (можно выбрать прошедшую дату)\n"
+        "• /import - импортировать данные из CSV-файла\n"
+        "• /recent - показать последние записи\n\n"
+        "🗓️ Команда /add_date позволяет:\n"
+        "• Быстро выбрать вчера, 2-7 дней назад, неделю назад\n"
+        "• Ввести дату вручную в удобных форматах (25.05.2025, 25.05.25, 25.05)\n"
+        "• Нельзя добавлять записи на будущие даты\n\n"
+        "Примечание: При повторном добавлении записи за ту же дату, новая запись заменит предыдущую. "
+        "Это удобно для корректировки показателей."
+    ),
+    "analytics": (
+        "📊 Аналитика и визуализация\n\n"
+        "• /stats - показать статистику по вашим записям\n"
+        "• /visualize - построить различные графики на основе ваших данных\n"
+        "• /analytics - выявить паттерны и зависимости в ваших данных\n"
+        "• /recent - показать последние записи\n\n"
+        "Для получения наиболее точного анализа рекомендуется иметь не менее 7 записей."
+    ),
+    "data_management": (
+        "🗂️ Управление данными\n\n"
+        "• /download - скачать ваш дневник в формате CSV\n"
+        "• /delete - удалить записи (все или за определенную дату)\n"
+        "• /recent - показать последние записи\n\n"
+        "Внимание: Удаление данных необратимо. Рекомендуется регулярно скачивать копию данных."
+    ),
+    "sharing": (
+        "🔄 Обмен данными\n\n"
+        "• /send - отправить ваш дневник другому пользователю\n"
+        "• /view_shared - просмотреть полученный дневник\n"
+        "• /id - показать ваш ID для получения дневников от других\n\n"
+        "При обмене данными используется дополнительное шифрование для обеспечения безопасности."
+    ),
+    "settings": (
+        "⚙️ Настройки\n\n"
+        "• /notify HH:MM - настроить ежедневные уведомления в указанное время\n"
+        "• /cancel_notify - отключить уведомления\n\n"
+        "Формат времени: часы:минуты в 24-часовом формате, например, 09:00 или 21:30."
+    ),
+    "all": (
+        "📋 Полный список команд\n\n"
+        "• /start - начать работу с ботом\n"
+        "• /help - показать это сообщение\n"
+        "• /add - добавить новую запись за сегодня\n"
+        "• /add_date - добавить запись за другую дату\n"
+        "• /cancel - отменить текущую операцию или диалог\n"
+        "• /stats - показать статистику\n"
+        "• /visualize - построить графики\n"
+        "• /analytics - выявить паттерны и закономерности\n"
+        "• /download - скачать дневник в CSV\n"
+        "• /import - импортировать из CSV\n"
+        "• /delete - удалить записи\n"
+        "• /send - отправить дневник другому\n"
+        "• /view_shared - просмотреть полученный дневник\n"
+        "• /id - показать ваш ID\n"
+        "• /notify HH:MM - настроить уведомления\n"
+        "• /cancel_notify - отключить уведомления\n"
+        "• /recent - показать последние записи"
+    )
+}
+
+# Текст для неизвестной категории справки
+HELP_UNKNOWN_CATEGORY_TEXT = "Неизвестная категория. Пожалуйста, выберите из предложенных."
+
+# Количество записей, показываемых командой /recent
+RECENT_ENTRIES_LIMIT = 5
+
+# Минимальный интервал между сообщениями об ошибке одному пользователю (в секундах)
+ERROR_NOTIFY_INTERVAL = 60
+
+# Время последнего сообщения об ошибке по пользователям
+# Структура: {chat_id: timestamp}
+_error_notify_times: Dict[int, float] = {}
+
+# Ключи user_data, в которых диалоги хранят промежуточное состояние.
+# /cancel удаляет только их, остальные данные пользователя сохраняются
+CONVERSATION_SCOPED_KEYS = frozenset({
+    # entry
+    "entry",
+    # analytics
+    "analytics_data",
+    # visualization
+    "chart_type", "metric",
+    # import_csv
+    "import_df", "import_filename",
+    # sharing
+    "recipient_id", "selected_date_range", "sharing_password",
+    # notifications
+    "timezone",
+})
+
+# Команды, перед которыми завершаются активные диалоги пользователя
+CONVERSATION_ENDING_COMMANDS = ("start", "help", "id", "recent")
+
+# Команды меню бота
+BOT_COMMANDS = (
+    BotCommand("start", "Начать работу с ботом"),
+    BotCommand("help", "Показать справку"),
+    BotCommand("add", "Добавить новую запись"),
+    BotCommand("cancel", "Отменить активную команду"),
+    BotCommand("stats", "Показать статистику"),
+    BotCommand("recent", "Показать последние записи"),
+    BotCommand("visualize", "Построить графики"),
+    BotCommand("analytics", "Выявить паттерны"),
+    BotCommand("download", "Скачать дневник в CSV"),
+    BotCommand("delete", "Удалить записи"),
+    BotCommand("notify", "Настроить уведомления"),
+    BotCommand("cancel_notify", "Отключить уведомления"),
+    BotCommand("id", "Показать ваш ID"),
+    BotCommand("send", "Отправить дневник другому"),
+    BotCommand("view_shared", "Просмотреть полученный дневник")
+)
+
+
+async def _end_conversations_before_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Завершает все активные диалоги пользователя перед простыми командами
+    (/start, /help, /id, /recent). Регистрируется в группе -1, поэтому
+    выполняется до основного обработчика команды.
+    """
+    end_all_conversations(update.effective_chat.id)
+
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обработчик команды /start.
     Приветствует пользователя и объясняет основные функции бота.
     """
-    # Завершаем все активные диалоги пользователя перед началом нового
     chat_id = update.effective_chat.id
-    end_all_conversations(chat_id)
 
-    # Сохранение информации о пользователе
+    # Сохранение информации о пользователе в фоне: приветствие отправляется,
+    # не дожидаясь записи в БД. Задача создается через приложение, чтобы
+    # исключения попадали в error_handler. save_user — UPSERT под блокировкой
+    # storage, поэтому повторный /start во время записи безопасен
     username = update.effective_user.username
     first_name = update.effective_user.first_name
-    save_user(chat_id, username, first_name)
-
-    logger.info(f"Новый пользователь начал сессию: {username} (ID: {chat_id})")
-
-    # Создание welcome-сообщения с форматированием
-    welcome_message = (
-        "🌈 Добро пожаловать в Трекер Настроения! 🌈\n\n"
-        "Я помогу вам отслеживать ваше настроение и другие психологические показатели "
-        "с акцентом на приватности и безопасности ваших данных.\n\n"
-        "📊 Основные возможности:\n"
-        "• Ежедневная оценка настроения и других показателей\n"
-        "• Визуализация данных с помощью графиков\n"
-        "• Выявление паттернов и зависимостей\n"
-        "• Безопасное хранение с шифрованием\n"
-        "• Возможность обмена данными с другими пользователями\n\n"
-        "🔐 Безопасность: Ваши данные автоматически шифруются с использованием вашего "
-        "Telegram ID. Вам не нужно запоминать отдельный пароль.\n\n"
-        "Используйте /help для просмотра всех доступных команд или /add для "
-        "добавления первой записи. Я проведу вас через все шаги!"
+    context.application.create_task(
+        asyncio.to_thread(save_user, chat_id, username, first_name),
+        update=update
     )
 
-    await update.message.reply_text(
-        welcome_message,
-        reply_markup=MAIN_KEYBOARD
-    )
+    logger.info("Новый пользователь начал сессию: %s (ID: %s)", username, chat_id)
+
+    await reply_main(update.message, WELCOME_MESSAGE)
 
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -62,169 +218,119 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Обработчик команды /help.
     Отображает категории команд и позволяет пользователю выбрать категорию для подробной информации.
     """
-    # Завершаем все активные диалоги пользователя перед началом нового
     chat_id = update.effective_chat.id
-    end_all_conversations(chat_id)
-
-    logger.info(f"Пользователь {chat_id} запросил справку")
-
-    # Создание кнопок для выбора категории команд с эмодзи
-    keyboard = [
-        [InlineKeyboardButton("📝 Добавление данных", callback_data=f"{HELP_PREFIX}data_entry")],
-        [InlineKeyboardButton("📊 Аналитика и визуализация", callback_data=f"{HELP_PREFIX}analytics")],
-        [InlineKeyboardButton("🗂️ Управление данными", callback_data=f"{HELP_PREFIX}data_management")],
-        [InlineKeyboardButton("🔄 Обмен данными", callback_data=f"{HELP_PREFIX}sharing")],
-        [InlineKeyboardButton("⚙️ Настройки", callback_data=f"{HELP_PREFIX}settings")],
-        [InlineKeyboardButton("📋 Полный список команд", callback_data=f"{HELP_PREFIX}all")],
-        [InlineKeyboardButton("❌ Закрыть", callback_data=f"{HELP_PREFIX}close")]
-    ]
-
-    # Создание заголовка
-    help_header = "🔍 Справка по командам\n\nВыберите категорию, чтобы узнать больше о доступных функциях:"
 
-    # Логирование того, что мы собираемся отправить
-    logger.info(f"Отправка справочного сообщения с {len(keyboard)} кнопками")
+    logger.info("Пользователь %s запросил справку", chat_id)
 
-    # Отправка сообщения
+    # Отправка сообщения с заранее созданной клавиатурой категорий
     await update.message.reply_text(
-        help_header,
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        HELP_HEADER,
+        reply_markup=HELP_MAIN_MARKUP
     )
 
 
-async def handle_help_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def _gather_callback_calls(*calls) -> None:
+    """
+    Выполняет независимые вызовы Telegram API параллельно.
+    Ошибка одного вызова не отменяет остальные и только логируется.
+
+    Args:
+        *calls: корутины вызовов API
+    """
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Ошибка при обработке callback справки: %s", result)
+
+
+async def _edit_help_message(query, text: str, reply_markup: InlineKeyboardMarkup) -> None:
+    """
+    Отвечает на callback и заменяет текст сообщения справки.
+    Отправляет только то, что действительно изменилось.
+
+    Args:
+        query: callback-запрос справки
+        text: новый текст сообщения
+        reply_markup: клавиатура под сообщением
+    """
+    message = query.message
+
+    # У callback-запросов из inline-режима сообщения нет — сравнивать не с чем
+    if message is not None and message.text == text:
+        if message.reply_markup == reply_markup:
+            # Сообщение уже в нужном состоянии (например, повторное нажатие)
+            await _gather_callback_calls(query.answer())
+            return
+        edit = query.edit_message_reply_markup(reply_markup=reply_markup)
+    else:
+        edit = query.edit_message_text(text, reply_markup=reply_markup)
+
+    # Ответ на callback и редактирование независимы — отправляем их параллельно
+    await _gather_callback_calls(query.answer(), edit)
+
+
+async def help_back(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обработчик кнопки "Назад к категориям" в справке.
     """
-    Общий обработчик всех callback запросов для справки.
+    logger.debug("Обработка команды 'назад'")
+    await _edit_help_message(update.callback_query, HELP_HEADER, HELP_MAIN_MARKUP)
+
+
+async def help_close(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Обработчик кнопки "Закрыть" в справке.
     """
     query = update.callback_query
+    logger.debug("Обработка команды 'закрыть'")
 
-    # Проверяем, что это действительно callback для справки
-    if not query.data.startswith(HELP_PREFIX):
-        return
+    await _gather_callback_calls(query.answer(), query.message.delete())
 
-    # Удаляем префикс для удобства обработки
-    action = query.data[len(HELP_PREFIX):]
 
-    # Логируем полученный callback для отладки
-    logger.info(f"Получен callback справки: {action}")
+def _make_help_category_callback(category: str):
+    """
+    Создает обработчик кнопки конкретной категории справки.
+
+    Args:
+        category: ключ категории в HELP_CATEGORY_TEXTS
+
+    Returns:
+        Асинхронный обработчик callback-запроса
+    """
+    category_text = HELP_CATEGORY_TEXTS[category]
+
+    async def show_help_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        logger.debug("Обработка категории '%s'", category)
+        await _edit_help_message(update.callback_query, category_text, HELP_BACK_MARKUP)
+
+    return show_help_category
+
+
+async def handle_help_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Общий обработчик callback запросов для справки.
+    Используется как запасной вариант для действий, у которых нет
+    собственного обработчика (например, устаревших кнопок).
+    """
+    query = update.callback_query
 
-    # Сначала отвечаем на callback, чтобы убрать часы загрузки
-    await query.answer()
+    # Действие уже выделено шаблоном HELP_CALLBACK_PATTERN
+    action = context.matches[0].group("action")
+
+    # Логируем полученный callback для отладки
+    logger.debug("Получен callback справки: %s", action)
 
-    # Обрабатываем команду "назад"
     if action == "back":
-        logger.info("Обработка команды 'назад'")
-
-        keyboard = [
-            [InlineKeyboardButton("📝 Добавление данных", callback_data=f"{HELP_PREFIX}data_entry")],
-            [InlineKeyboardButton("📊 Аналитика и визуализация", callback_data=f"{HELP_PREFIX}analytics")],
-            [InlineKeyboardButton("🗂️ Управление данными", callback_data=f"{HELP_PREFIX}data_management")],
-            [InlineKeyboardButton("🔄 Обмен данными", callback_data=f"{HELP_PREFIX}sharing")],
-            [InlineKeyboardButton("⚙️ Настройки", callback_data=f"{HELP_PREFIX}settings")],
-            [InlineKeyboardButton("📋 Полный список команд", callback_data=f"{HELP_PREFIX}all")],
-            [InlineKeyboardButton("❌ Закрыть", callback_data=f"{HELP_PREFIX}close")]
-        ]
-
-        header = "🔍 Справка по командам\n\nВыберите категорию, чтобы узнать больше о доступных функциях:"
-
-        await query.message.edit_text(
-            header,
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-
-    # Обрабатываем команду "закрыть"
-    elif action == "close":
-        logger.info("Обработка команды 'закрыть'")
-        try:
-            await query.message.delete()
-        except Exception as e:
-            logger.warning(f"Не удалось удалить сообщение: {e}")
-
-    # Обрабатываем все остальные категории
-    else:
-        logger.info(f"Обработка категории '{action}'")
-
-        # Определяем текст справки в зависимости от категории
-        if action == "data_entry":
-            category_text = (
-                "📝 Добавление данных\n\n"
-                "• /add - добавить новую запись за сегодня (я проведу вас через все шаги)\n"
-                "• /add_date - добавить запись за другую дату (можно выбрать прошедшую дату)\n"
-                "• /import - импортировать данные из CSV-файла\n"
-                "• /recent - показать последние записи\n\n"
-                "🗓️ Команда /add_date позволяет:\n"
-                "• Быстро выбрать вчера, 2-7 дней назад, неделю назад\n"
-                "• Ввести дату вручную в удобных форматах (25.05.2025, 25.05.25, 25.05)\n"
-                "• Нельзя добавлять записи на будущие даты\n\n"
-                "Примечание: При повторном добавлении записи за ту же дату, новая запись заменит предыдущую. "
-                "Это удобно для корректировки показателей."
-            )
-        elif action == "analytics":
-            category_text = (
-                "📊 Аналитика и визуализация\n\n"
-                "• /stats - показать статистику по вашим записям\n"
-                "• /visualize - построить различные графики на основе ваших данных\n"
-                "• /analytics - выявить паттерны и зависимости в ваших данных\n"
-                "• /recent - показать последние записи\n\n"
-                "Для получения наиболее точного анализа рекомендуется иметь не менее 7 записей."
-            )
-        elif action == "data_management":
-            category_text = (
-                "🗂️ Управление данными\n\n"
-                "• /download - скачать ваш дневник в формате CSV\n"
-                "• /delete - удалить записи (все или за определенную дату)\n"
-                "• /recent - показать последние записи\n\n"
-                "Внимание: Удаление данных необратимо. Рекомендуется регулярно скачивать копию данных."
-            )
-        elif action == "sharing":
-            category_text = (
-                "🔄 Обмен данными\n\n"
-                "• /send - отправить ваш дневник другому пользователю\n"
-                "• /view_shared - просмотреть полученный дневник\n"
-                "• /id - показать ваш ID для получения дневников от других\n\n"
-                "При обмене данными используется дополнительное шифрование для обеспечения безопасности."
-            )
-        elif action == "settings":
-            category_text = (
-                "⚙️ Настройки\n\n"
-                "• /notify HH:MM - настроить ежедневные уведомления в указанное время\n"
-                "• /cancel_notify - отключить уведомления\n\n"
-                "Формат времени: часы:минуты в 24-часовом формате, например, 09:00 или 21:30."
-            )
-        elif action == "all":
-            category_text = (
-                "📋 Полный список команд\n\n"
-                "• /start - начать работу с ботом\n"
-                "• /help - показать это сообщение\n"
-                "• /add - добавить новую запись за сегодня\n"
-                "• /add_date - добавить запись за другую дату\n"
-                "• /cancel - отменить текущую операцию или диалог\n"
-                "• /stats - показать статистику\n"
-                "• /visualize - построить графики\n"
-                "• /analytics - выявить паттерны и закономерности\n"
-                "• /download - скачать дневник в CSV\n"
-                "• /import - импортировать из CSV\n"
-                "• /delete - удалить записи\n"
-                "• /send - отправить дневник другому\n"
-                "• /view_shared - просмотреть полученный дневник\n"
-                "• /id - показать ваш ID\n"
-                "• /notify HH:MM - настроить уведомления\n"
-                "• /cancel_notify - отключить уведомления\n"
-                "• /recent - показать последние записи"
-            )
-        else:
-            category_text = "Неизвестная категория. Пожалуйста, выберите из предложенных."
-        # Создание кнопки возврата
-        keyboard = [
-            [InlineKeyboardButton("🔙 Назад к категориям", callback_data=f"{HELP_PREFIX}back")],
-            [InlineKeyboardButton("❌ Закрыть", callback_data=f"{HELP_PREFIX}close")]
-        ]
-
-        # Отправка ответа
-        await query.message.edit_text(
-            category_text,
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
+        await help_back(update, context)
+        return
+
+    if action == "close":
+        await help_close(update, context)
+        return
+
+    # Определяем текст справки в зависимости от категории
+    category_text = HELP_CATEGORY_TEXTS.get(action, HELP_UNKNOWN_CATEGORY_TEXT)
+    await _edit_help_message(query, category_text, HELP_BACK_MARKUP)
 
 
 async def get_user_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -232,17 +338,15 @@ async def get_user_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Обработчик команды /id.
     Отправляет пользователю его ID для обмена дневниками.
     """
-    # Завершаем все активные диалоги пользователя перед началом нового
     chat_id = update.effective_chat.id
-    end_all_conversations(chat_id)
 
-    logger.info(f"Пользователь {chat_id} запросил свой ID")
+    logger.info("Пользователь %s запросил свой ID", chat_id)
 
-    await update.message.reply_text(
+    await reply_main(
+        update.message,
         f"🆔 Ваш ID: {chat_id}\n\n"
         "Вы можете поделиться этим ID с другими пользователями, "
-        "чтобы они могли отправить вам свой дневник через команду /send.",
-        reply_markup=MAIN_KEYBOARD
+        "чтобы они могли отправить вам свой дневник через команду /send."
     )
 
 
@@ -252,41 +356,55 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Отменяет любой текущий диалог с пользователем.
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Пользователь {chat_id} использовал команду /cancel")
-
-    # Вывод всех активных диалогов для отладки
-    dump_all_conversations()
+    logger.info("Пользователь %s использовал команду /cancel", chat_id)
 
-    # Проверка есть ли активные диалоги перед отменой
-    has_active = has_active_conversations(chat_id)
+    # Вывод всех активных диалогов для отладки (только при уровне DEBUG)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    if debug_enabled:
+        dump_all_conversations()
 
-    # Завершаем все активные диалоги
+    # Завершаем все активные диалоги; пустой набор означает, что отменять нечего
     ended_conversations = end_all_conversations(chat_id)
 
     # Вывод всех активных диалогов после отмены для отладки
-    dump_all_conversations()
+    if debug_enabled:
+        dump_all_conversations()
 
-    # Очистка данных пользователя
-    context.user_data.clear()
+    # Очистка состояния прерванных диалогов
+    for key in CONVERSATION_SCOPED_KEYS & context.user_data.keys():
+        del context.user_data[key]
 
     # Формируем сообщение в зависимости от наличия активных диалогов
     if ended_conversations:
         message = "❌ Все активные команды отменены."
-        logger.info(f"Отменены команды: {ended_conversations}")
+        logger.info("Отменены команды: %s", ended_conversations)
     else:
-        if has_active:
-            message = "❌ Все активные команды отменены."
-            logger.info("Активные команды были, но не найдены в менеджере")
-        else:
-            message = "ℹ️ Нет активных команд для отмены."
-            logger.info("Активные команды не найдены")
+        message = "ℹ️ Нет активных команд для отмены."
+        logger.info("Активные команды не найдены")
 
-    await update.message.reply_text(
-        message,
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, message)
+
+    return _END
+
+
+def _format_recent_entries(chat_id: int) -> Optional[str]:
+    """
+    Загружает и форматирует последние записи пользователя.
+    Синхронная функция для запуска в отдельном потоке.
+
+    Args:
+        chat_id: ID пользователя в Telegram
 
-    return ConversationHandler.END
+    Returns:
+        Optional[str]: отформатированный список или None, если записей нет
+    """
+    # Получение только последних записей: расшифровываются лишь они
+    entries = get_recent_entries(chat_id, RECENT_ENTRIES_LIMIT)
+    if not entries:
+        return None
+
+    total_count = count_user_entries(chat_id)
+    return format_entry_list(entries, RECENT_ENTRIES_LIMIT, total_count=total_count)
 
 
 async def recent_entries(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -294,62 +412,68 @@ async def recent_entries(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Обработчик команды /recent.
     Отображает недавние записи пользователя.
     """
-    # Завершаем все активные диалоги пользователя перед началом нового
     chat_id = update.effective_chat.id
-    end_all_conversations(chat_id)
 
-    logger.info(f"Пользователь {chat_id} запросил недавние записи")
+    logger.info("Пользователь %s запросил недавние записи", chat_id)
 
-    # Получение записей пользователя
-    entries = get_user_entries(chat_id)
+    # Чтение из БД, расшифровка и форматирование — в отдельном потоке,
+    # чтобы не блокировать цикл событий
+    formatted_entries = await asyncio.to_thread(_format_recent_entries, chat_id)
 
-    if not entries:
-        await update.message.reply_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
-            reply_markup=MAIN_KEYBOARD
-        )
+    if formatted_entries is None:
+        await reply_main(update.message, NO_ENTRIES_MESSAGE)
         return
 
-    # Форматирование и отправка списка последних записей
-    formatted_entries = format_entry_list(entries)
-
-    await update.message.reply_text(
-        formatted_entries,
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, formatted_entries)
 
 
 async def setup_commands(application):
     """
     Устанавливает список команд для меню бота.
+    Если на сервере уже установлен тот же список, повторный запрос не отправляется.
     """
-    commands = [
-        BotCommand("start", "Начать работу с ботом"),
-        BotCommand("help", "Показать справку"),
-        BotCommand("add", "Добавить новую запись"),
-        BotCommand("cancel", "Отменить активную команду"),
-        BotCommand("stats", "Показать статистику"),
-        BotCommand("recent", "Показать последние записи"),
-        BotCommand("visualize", "Построить графики"),
-        BotCommand("analytics", "Выявить паттерны"),
-        BotCommand("download", "Скачать дневник в CSV"),
-        BotCommand("delete", "Удалить записи"),
-        BotCommand("notify", "Настроить уведомления"),
-        BotCommand("cancel_notify", "Отключить уведомления"),
-        BotCommand("id", "Показать ваш ID"),
-        BotCommand("send", "Отправить дневник другому"),
-        BotCommand("view_shared", "Просмотреть полученный дневник")
+    current_commands = await application.bot.get_my_commands()
+    if tuple(current_commands) == BOT_COMMANDS:
+        logger.info("Команды меню бота не изменились")
+        return
+
+    await application.bot.set_my_commands(BOT_COMMANDS)
+    logger.info("Установлено %s команд для меню бота", len(BOT_COMMANDS))
+
+
+def _should_notify_about_error(chat_id: int) -> bool:
+    """
+    Проверяет, можно ли отправить пользователю сообщение об ошибке.
+    При серии ошибок пользователь получает не более одного сообщения
+    за ERROR_NOTIFY_INTERVAL. Попутно удаляет устаревшие отметки.
+
+    Args:
+        chat_id: ID пользователя в Telegram
+
+    Returns:
+        bool: True, если сообщение нужно отправить
+    """
+    now = time.monotonic()
+
+    expired_keys = [
+        key for key, timestamp in _error_notify_times.items()
+        if now - timestamp > ERROR_NOTIFY_INTERVAL
     ]
+    for key in expired_keys:
+        del _error_notify_times[key]
+
+    if chat_id in _error_notify_times:
+        return False
 
-    await application.bot.set_my_commands(commands)
-    logger.info("Установлены команды для меню бота")
+    _error_notify_times[chat_id] = now
+    return True
 
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обработчик ошибок для приложения.
     """
-    logger.exception(f"Произошла ошибка при обработке обновления: {context.error}")
+    logger.exception("Произошла ошибка при обработке обновления: %s", context.error)
 
     # Если обновление доступно, можно получить chat_id
     if update:
@@ -357,10 +481,14 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         if chat_id:
             # В случае ошибки завершаем все активные диалоги пользователя
-            logger.info(f"Завершение всех диалогов пользователя {chat_id} из-за ошибки")
+            logger.info("Завершение всех диалогов пользователя %s из-за ошибки", chat_id)
             end_all_conversations(chat_id)
 
-            # Уведомление пользователя о проблеме
+            # Уведомление пользователя о проблеме (не чаще раза в интервал)
+            if not _should_notify_about_error(chat_id):
+                logger.debug("Сообщение об ошибке пользователю %s уже отправлялось недавно", chat_id)
+                return
+
             try:
                 await context.bot.send_message(
                     chat_id=chat_id,
@@ -368,22 +496,39 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     reply_markup=MAIN_KEYBOARD
                 )
             except Exception as e:
-                logger.error(f"Не удалось отправить сообщение об ошибке: {e}")
+                logger.error("Не удалось отправить сообщение об ошибке: %s", e)
 
 
 def register(application):
     """
     Регистрирует обработчики в приложении.
     """
-    # Добавление обработчиков простых команд
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("id", get_user_id))
-    application.add_handler(CommandHandler("cancel", cancel))
-    application.add_handler(CommandHandler("recent", recent_entries))
+    # Перед простыми командами завершаем активные диалоги пользователя.
+    # Обработчик блокирующий, чтобы отработать до команд из группы 0
+    application.add_handler(
+        CommandHandler(CONVERSATION_ENDING_COMMANDS, _end_conversations_before_command),
+        group=-1
+    )
 
-    # Добавляем обработчик callback-запросов для справки
-    application.add_handler(CallbackQueryHandler(handle_help_callback, pattern=f"^{HELP_PREFIX}"))
+    # Добавление обработчиков простых команд. Они не участвуют в диалогах,
+    # поэтому выполняются без блокировки обработки остальных обновлений
+    application.add_handler(CommandHandler("start", start, block=False))
+    application.add_handler(CommandHandler("help", help_command, block=False))
+    application.add_handler(CommandHandler("id", get_user_id, block=False))
+    application.add_handler(CommandHandler("cancel", cancel, block=False))
+    application.add_handler(CommandHandler("recent", recent_entries, block=False))
+
+    # Добавляем обработчики callback-запросов для справки: по одному на каждое действие
+    application.add_handler(CallbackQueryHandler(help_back, pattern=f"^{HELP_PREFIX}back$", block=False))
+    application.add_handler(CallbackQueryHandler(help_close, pattern=f"^{HELP_PREFIX}close$", block=False))
+    for category in HELP_CATEGORY_TEXTS:
+        application.add_handler(CallbackQueryHandler(
+            _make_help_category_callback(category),
+            pattern=f"^{HELP_PREFIX}{category}$",
+            block=False
+        ))
+    # Запасной обработчик для остальных callback-запросов справки
+    application.add_handler(CallbackQueryHandler(handle_help_callback, pattern=HELP_CALLBACK_PATTERN, block=False))
 
     # Добавляем обработчик ошибок
     application.add_error_handler(error_handler)
@@ -3,6 +3,7 @@
 Обрабатывает команды для удаления записей по дате или всех записей.
 """
 
+import asyncio
 import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -11,14 +12,26 @@ from telegram.ext import (
     MessageHandler, filters, CallbackQueryHandler
 )
 
-from src.config import DELETE_ENTRY_CONFIRM, DELETE_ENTRY_DATE
-from src.utils.keyboards import MAIN_KEYBOARD
+from src.config import DELETE_ENTRY_CONFIRM, DELETE_ENTRY_DATE, CONVERSATION_TIMEOUT
+from src.utils.keyboards import reply_main
 from src.data.storage import delete_all_entries, delete_entry_by_date
 from src.handlers.basic import cancel
 
 # Настройка логгирования
 logger = logging.getLogger(__name__)
 
+# Клавиатуры неизменяемы, поэтому создаются один раз при импорте модуля
+DELETE_MENU_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Удалить все записи", callback_data="delete_all")],
+    [InlineKeyboardButton("Удалить запись за определенную дату", callback_data="delete_by_date")],
+    [InlineKeyboardButton("Отмена", callback_data="delete_cancel")]
+])
+
+DELETE_CONFIRM_ALL_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Да, удалить все", callback_data="confirm_delete_all")],
+    [InlineKeyboardButton("Отмена", callback_data="delete_cancel")]
+])
+
 
 async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -33,23 +46,104 @@ async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         int: следующее состояние диалога (DELETE_ENTRY_CONFIRM)
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Пользователь {chat_id} вызвал команду удаления записей")
-    
-    # Создаем кнопки для выбора режима удаления
-    keyboard = [
-        [InlineKeyboardButton("Удалить все записи", callback_data="delete_all")],
-        [InlineKeyboardButton("Удалить запись за определенную дату", callback_data="delete_by_date")],
-        [InlineKeyboardButton("Отмена", callback_data="delete_cancel")]
-    ]
+    logger.info("Пользователь %s вызвал команду удаления записей", chat_id)
     
     await update.message.reply_text(
         "Выберите режим удаления записей:",
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        reply_markup=DELETE_MENU_MARKUP
     )
     
     return DELETE_ENTRY_CONFIRM
 
 
+async def _finish_delete(query, text: str) -> int:
+    """
+    Завершает диалог удаления одним запросом: заменяет сообщение с кнопками
+    итоговым текстом. Основная клавиатура постоянная и остается на экране,
+    поэтому отдельное сообщение с ней не отправляется.
+
+    Args:
+        query: callback-запрос
+        text: итоговый текст сообщения
+
+    Returns:
+        int: состояние ConversationHandler.END
+    """
+    await query.message.edit_text(
+        f"{text}\n\nВы можете продолжить работу с ботом.",
+        reply_markup=None
+    )
+
+    return ConversationHandler.END
+
+
+async def _delete_ask_confirm_all(query, chat_id: int) -> int:
+    """Запрашивает подтверждение удаления всех записей."""
+    await query.message.edit_text(
+        "Вы уверены, что хотите удалить ВСЕ записи? Это действие нельзя отменить!",
+        reply_markup=DELETE_CONFIRM_ALL_MARKUP
+    )
+
+    return DELETE_ENTRY_CONFIRM
+
+
+async def _delete_ask_date(query, chat_id: int) -> int:
+    """Запрашивает дату записи для удаления."""
+    await query.message.edit_text(
+        "Введите дату записи, которую хотите удалить, в формате ГГГГ-ММ-ДД (например, 2023-12-25):"
+    )
+
+    return DELETE_ENTRY_DATE
+
+
+async def _delete_cancel(query, chat_id: int) -> int:
+    """Отменяет удаление."""
+    return await _finish_delete(query, "Удаление отменено.")
+
+
+async def _delete_confirm_all(query, chat_id: int) -> int:
+    """Удаляет все записи пользователя после подтверждения."""
+    if await asyncio.to_thread(delete_all_entries, chat_id):
+        return await _finish_delete(query, "Все записи успешно удалены.")
+
+    return await _finish_delete(
+        query, "Произошла ошибка при удалении записей, или у вас еще нет записей."
+    )
+
+
+async def _delete_unknown(query, chat_id: int) -> int:
+    """Завершает диалог при неизвестном выборе."""
+    return await _finish_delete(query, "Неизвестная команда. Удаление отменено.")
+
+
+# Префиксы callback_data кнопок диалога удаления
+DELETE_CALLBACK_PREFIXES = ("delete_", "confirm_delete_")
+
+
+def _is_delete_callback(data) -> bool:
+    """
+    Проверяет, относится ли callback_data к диалогу удаления.
+    Простая проверка префикса вместо регулярного выражения.
+
+    Args:
+        data: callback_data нажатой кнопки
+
+    Returns:
+        bool: True, если кнопка относится к диалогу удаления
+    """
+    return isinstance(data, str) and data.startswith(DELETE_CALLBACK_PREFIXES)
+
+
+# Обработчики выбора режима удаления по callback_data
+_DELETE_DISPATCH = {
+    "delete_all": _delete_ask_confirm_all,
+    "delete_by_date": _delete_ask_date,
+    "delete_cancel": _delete_cancel,
+    "confirm_delete_cancel": _delete_cancel,
+    "confirm_delete_all": _delete_confirm_all,
+}
+
+
 async def delete_choice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обрабатывает выбор режима удаления.
@@ -65,78 +159,9 @@ async def delete_choice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     
     chat_id = query.message.chat_id
-    choice = query.data
-    
-    if choice == "delete_all":
-        # Запрос подтверждения удаления всех записей
-        keyboard = [
-            [InlineKeyboardButton("Да, удалить все", callback_data="confirm_delete_all")],
-            [InlineKeyboardButton("Отмена", callback_data="delete_cancel")]
-        ]
-        
-        await query.message.edit_text(
-            "Вы уверены, что хотите удалить ВСЕ записи? Это действие нельзя отменить!",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
-        
-        return DELETE_ENTRY_CONFIRM
-    
-    elif choice == "delete_by_date":
-        # Запрос даты для удаления записи
-        await query.message.edit_text(
-            "Введите дату записи, которую хотите удалить, в формате ГГГГ-ММ-ДД (например, 2023-12-25):"
-        )
-        
-        return DELETE_ENTRY_DATE
-    
-    elif choice == "delete_cancel" or choice == "confirm_delete_cancel":
-        # Отмена удаления
-        await query.message.edit_text(
-            "Удаление отменено.",
-            reply_markup=None
-        )
-        
-        await query.message.reply_text(
-            "Вы можете продолжить работу с ботом.",
-            reply_markup=MAIN_KEYBOARD
-        )
-        
-        return ConversationHandler.END
-    
-    elif choice == "confirm_delete_all":
-        # Подтверждено удаление всех записей
-        result = delete_all_entries(chat_id)
-        
-        if result:
-            await query.message.edit_text(
-                "Все записи успешно удалены.",
-                reply_markup=None
-            )
-        else:
-            await query.message.edit_text(
-                "Произошла ошибка при удалении записей, или у вас еще нет записей.",
-                reply_markup=None
-            )
-        
-        await query.message.reply_text(
-            "Вы можете продолжить работу с ботом.",
-            reply_markup=MAIN_KEYBOARD
-        )
-        
-        return ConversationHandler.END
-    
-    # В случае неизвестного выбора
-    await query.message.edit_text(
-        "Неизвестная команда. Удаление отменено.",
-        reply_markup=None
-    )
-    
-    await query.message.reply_text(
-        "Вы можете продолжить работу с ботом.",
-        reply_markup=MAIN_KEYBOARD
-    )
-    
-    return ConversationHandler.END
+    handler = _DELETE_DISPATCH.get(query.data, _delete_unknown)
+
+    return await handler(query, chat_id)
 
 
 async def delete_by_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -158,24 +183,22 @@ async def delete_by_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
         date_obj = datetime.strptime(date_text, '%Y-%m-%d')
         formatted_date = date_obj.strftime('%Y-%m-%d')
     except ValueError:
-        await update.message.reply_text(
-            "Неверный формат даты. Пожалуйста, используйте формат ГГГГ-ММ-ДД (например, 2023-12-25).",
-            reply_markup=MAIN_KEYBOARD
+        await reply_main(
+            update.message,
+            "Неверный формат даты. Пожалуйста, используйте формат ГГГГ-ММ-ДД (например, 2023-12-25)."
         )
         return ConversationHandler.END
     
-    # Попытка удаления записи
-    result = delete_entry_by_date(chat_id, formatted_date)
+    # Попытка удаления записи (запрос к БД — в отдельном потоке;
+    # транзакции из разных потоков сериализует storage)
+    result = await asyncio.to_thread(delete_entry_by_date, chat_id, formatted_date)
     
     if result:
-        await update.message.reply_text(
-            f"Запись за {formatted_date} успешно удалена.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, f"Запись за {formatted_date} успешно удалена.")
     else:
-        await update.message.reply_text(
-            f"Запись за {formatted_date} не найдена или произошла ошибка при удалении.",
-            reply_markup=MAIN_KEYBOARD
+        await reply_main(
+            update.message,
+            f"Запись за {formatted_date} не найдена или произошла ошибка при удалении."
         )
     
     return ConversationHandler.END
@@ -192,10 +215,13 @@ def register(application):
     delete_handler = ConversationHandler(
         entry_points=[CommandHandler("delete", delete_command)],
         states={
-            DELETE_ENTRY_CONFIRM: [CallbackQueryHandler(delete_choice, pattern=r"^delete_|^confirm_delete_")],
+            DELETE_ENTRY_CONFIRM: [CallbackQueryHandler(delete_choice, pattern=_is_delete_callback)],
             DELETE_ENTRY_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, delete_by_date)],
         },
         fallbacks=[CommandHandler("cancel", cancel)],
+        # Диалог удаления не хранит данных пользователя, поэтому по таймауту
+        # он просто завершается
+        conversation_timeout=CONVERSATION_TIMEOUT,
     )
     
     application.add_handler(delete_handler)
@@ -3,24 +3,26 @@
 Реализует диалоговый процесс ввода всех показателей.
 """
 
+import asyncio
 import logging
+from typing import Optional
 from telegram import Update, ReplyKeyboardRemove
 from telegram.ext import (
     ContextTypes, ConversationHandler, CommandHandler,
-    MessageHandler, CallbackQueryHandler, filters, Application
+    MessageHandler, CallbackQueryHandler, TypeHandler, filters, Application
 )
 
 from src.config import (
     MOOD, SLEEP, COMMENT, BALANCE, MANIA, DEPRESSION,
     ANXIETY, IRRITABILITY, PRODUCTIVITY, SOCIABILITY,
-    DATE_SELECTION, MANUAL_DATE_INPUT
+    DATE_SELECTION, MANUAL_DATE_INPUT, CONVERSATION_TIMEOUT
 )
-from src.utils.keyboards import NUMERIC_KEYBOARD, MAIN_KEYBOARD
+from src.utils.keyboards import NUMERIC_KEYBOARD, reply_main
 from src.data.storage import save_data, save_user, get_user_entries
 from src.utils.formatters import format_entry_summary
 from src.utils.date_helpers import get_today
 from src.utils.conversation_manager import register_conversation, end_conversation, end_all_conversations
-from src.utils.validation import validate_numeric_input, get_validation_error_message
+from src.utils.validation import get_validation_error_message, validate_comment
 
 # Настройка логгирования
 logger = logging.getLogger(__name__)
@@ -31,6 +33,88 @@ HANDLER_NAME = "entry_handler"
 # Глобальный объект для хранения ссылки на обработчик разговора
 entry_conversation_handler = None
 
+# Фильтры сообщений создаются один раз и разделяются всеми шагами диалогов
+TEXT_NO_COMMAND_FILTER = filters.TEXT & ~filters.COMMAND
+RATING_FILTER = TEXT_NO_COMMAND_FILTER & filters.Regex(r'^([1-9]|10)$')
+
+# Допустимые оценки показателей — ровно то, что отправляет NUMERIC_KEYBOARD
+# (в отличие от str.isdigit(), не пропускает цифры других алфавитов)
+_VALID_RATINGS = frozenset(str(value) for value in range(1, 11))
+
+# Максимальная длина комментария к записи
+MAX_COMMENT_LENGTH = 1000
+
+# Поля записи в порядке их заполнения в диалоге
+ENTRY_FIELDS = (
+    'date', 'mood', 'sleep', 'comment', 'balance', 'mania',
+    'depression', 'anxiety', 'irritability', 'productivity', 'sociability'
+)
+
+# Шаги ввода числовых показателей (от 1 до 10)
+# Структура: {поле: (название показателя, текущее состояние, следующее состояние,
+#                    вопрос для следующего шага, клавиатура для следующего шага)}
+RATING_STEPS = {
+    'mood': ("настроение", MOOD, SLEEP,
+             "Оцените качество вашего сна от 1 до 10:", NUMERIC_KEYBOARD),
+    'sleep': ("качество сна", SLEEP, COMMENT,
+              "Введите комментарий к записи (можно пропустить, отправив символ '-'):\n"
+              "(Чтобы отменить процесс, нажмите /cancel)", ReplyKeyboardRemove()),
+    'balance': ("ровность настроения", BALANCE, MANIA,
+                "Оцените уровень мании от 1 до 10:", NUMERIC_KEYBOARD),
+    'mania': ("уровень мании", MANIA, DEPRESSION,
+              "Оцените уровень депрессии от 1 до 10:", NUMERIC_KEYBOARD),
+    'depression': ("уровень депрессии", DEPRESSION, ANXIETY,
+                   "Оцените уровень тревоги от 1 до 10:", NUMERIC_KEYBOARD),
+    'anxiety': ("уровень тревоги", ANXIETY, IRRITABILITY,
+                "Оцените уровень раздражительности от 1 до 10:", NUMERIC_KEYBOARD),
+    'irritability': ("уровень раздражительности", IRRITABILITY, PRODUCTIVITY,
+                     "Оцените вашу работоспособность от 1 до 10:", NUMERIC_KEYBOARD),
+    'productivity': ("уровень работоспособности", PRODUCTIVITY, SOCIABILITY,
+                     "Оцените вашу общительность от 1 до 10:", NUMERIC_KEYBOARD),
+}
+
+
+def _make_rating_step(handler_name: str, field: str):
+    """
+    Создает обработчик шага ввода числового показателя.
+    Обработчик проверяет оценку, сохраняет ее в запись и задает следующий вопрос.
+
+    Args:
+        handler_name: имя диалога в менеджере диалогов
+        field: ключ показателя в RATING_STEPS
+
+    Returns:
+        Callable: асинхронный обработчик шага диалога
+    """
+    label, current_state, next_state, next_prompt, next_markup = RATING_STEPS[field]
+
+    async def rating_step(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        text = update.message.text
+        chat_id = update.effective_chat.id
+
+        # Валидация ввода (должно быть число от 1 до 10)
+        if text not in _VALID_RATINGS:
+            logger.debug("Пользователь %s ввел недопустимое значение (%s): %r", chat_id, label, text)
+            await update.message.reply_text(
+                get_validation_error_message(label),
+                reply_markup=NUMERIC_KEYBOARD
+            )
+            return current_state
+
+        # Обновление состояния в менеджере диалогов
+        register_conversation(chat_id, handler_name, next_state)
+
+        logger.debug("Пользователь %s установил %s: %s", chat_id, label, text)
+        context.user_data['entry'][field] = int(text)
+
+        await update.message.reply_text(next_prompt, reply_markup=next_markup)
+        return next_state
+
+    rating_step.__name__ = field if handler_name == HANDLER_NAME else f"{field}_with_date"
+    rating_step.__qualname__ = rating_step.__name__
+    rating_step.__doc__ = f"Сохраняет оценку ({label}) и переходит к следующему шагу."
+    return rating_step
+
 
 def check_entry_exists(chat_id: int, date: str) -> bool:
     """
@@ -70,7 +154,7 @@ async def custom_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Локальный обработчик отмены для этого диалога.
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Отмена диалога добавления записи для пользователя {chat_id}")
+    logger.info("Отмена диалога добавления записи для пользователя %s", chat_id)
 
     # Завершение диалога в менеджере
     end_conversation(chat_id, HANDLER_NAME)
@@ -79,14 +163,86 @@ async def custom_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if 'entry' in context.user_data:
         context.user_data.pop('entry')
 
-    await update.message.reply_text(
-        "Добавление записи отменено.",
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, "Добавление записи отменено.")
 
     return ConversationHandler.END
 
 
+def _new_entry(date=None) -> dict:
+    """
+    Создает заготовку записи со всеми полями сразу.
+    Словарь не растет по ходу диалога, а порядок ключей всегда одинаков.
+
+    Args:
+        date: дата записи в формате YYYY-MM-DD (None, если еще не выбрана)
+
+    Returns:
+        dict: запись с незаполненными показателями
+    """
+    entry = dict.fromkeys(ENTRY_FIELDS)
+    entry['date'] = date
+    return entry
+
+
+def _parse_comment(text: str) -> Optional[str]:
+    """
+    Приводит комментарий к виду для хранения: обрезает пробелы и длину.
+
+    Args:
+        text: текст сообщения пользователя
+
+    Returns:
+        Optional[str]: комментарий или None, если пользователь его пропустил
+    """
+    _, entry_comment = validate_comment(text, max_length=MAX_COMMENT_LENGTH)
+    if entry_comment in ('', '-'):
+        return None
+    return entry_comment
+
+
+def _save_user_in_background(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Сохраняет информацию о пользователе в фоне, не задерживая первый вопрос диалога.
+    Задача создается через приложение, чтобы исключения попадали в error_handler.
+
+    Args:
+        update: объект с информацией о сообщении
+        context: контекст бота
+    """
+    context.application.create_task(
+        asyncio.to_thread(
+            save_user,
+            update.effective_chat.id,
+            update.effective_user.username,
+            update.effective_user.first_name
+        ),
+        update=update
+    )
+
+
+def _make_timeout_callback(handler_name: str):
+    """
+    Создает обработчик истечения времени диалога.
+    Обработчик освобождает незавершенную запись и снимает диалог с учета.
+
+    Args:
+        handler_name: имя диалога в менеджере диалогов
+
+    Returns:
+        Callable: асинхронный обработчик состояния ConversationHandler.TIMEOUT
+    """
+    async def on_timeout(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat_id = update.effective_chat.id
+        logger.info("Диалог %s пользователя %s завершен по таймауту", handler_name, chat_id)
+
+        end_conversation(chat_id, handler_name)
+        context.user_data.pop('entry', None)
+
+        return ConversationHandler.END
+
+    return on_timeout
+
+
 async def start_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Начинает процесс добавления новой записи.
@@ -99,10 +255,8 @@ async def start_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Регистрируем новый активный диалог
     register_conversation(chat_id, HANDLER_NAME, MOOD)
 
-    # Сохранение информации о пользователе
-    username = update.effective_user.username
-    first_name = update.effective_user.first_name
-    save_user(chat_id, username, first_name)
+    # Сохранение информации о пользователе в фоне
+    _save_user_in_background(update, context)
 
     # Получение текущей даты
     today = get_today()
@@ -116,14 +270,14 @@ async def start_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
             break
 
     # Инициализация словаря данных пользователя с датой
-    context.user_data['entry'] = {'date': today}
+    context.user_data['entry'] = _new_entry(today)
 
     # Подготовка сообщения о замене существующей записи
     replace_message = ""
     if today_entry:
         replace_message = "У вас уже есть запись за сегодня. Новая запись заменит существующую.\n\n"
 
-    logger.info(f"Пользователь {chat_id} начал добавление новой записи за {today}")
+    logger.info("Пользователь %s начал добавление новой записи за %s", chat_id, today)
 
     await update.effective_message.reply_text(
         f"{replace_message}Добавляем новую запись за {today}.\n\n"
@@ -155,15 +309,13 @@ async def start_entry_with_date(update: Update, context: ContextTypes.DEFAULT_TY
     # Регистрируем новый активный диалог
     register_conversation(chat_id, HANDLER_DATE_NAME, DATE_SELECTION)
 
-    # Сохранение информации о пользователе
-    username = update.effective_user.username
-    first_name = update.effective_user.first_name
-    save_user(chat_id, username, first_name)
+    # Сохранение информации о пользователе в фоне
+    _save_user_in_background(update, context)
 
     # Инициализация словаря данных пользователя без даты
-    context.user_data['entry'] = {}
+    context.user_data['entry'] = _new_entry()
 
-    logger.info(f"Пользователь {chat_id} начал добавление записи с выбором даты")
+    logger.info("Пользователь %s начал добавление записи с выбором даты", chat_id)
 
     # Импортируем клавиатуру для выбора даты
     from src.utils.keyboards import get_date_selection_keyboard
@@ -230,7 +382,7 @@ async def select_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Подготовка сообщения о замене существующей записи
         replace_message = get_replacement_message(selected_date) if entry_exists else ""
 
-        logger.info(f"Пользователь {chat_id} выбрал дату для записи: {selected_date}")
+        logger.info("Пользователь %s выбрал дату для записи: %s", chat_id, selected_date)
 
         formatted_date = format_date_for_user(selected_date, include_day_name=True)
         
@@ -263,7 +415,6 @@ async def manual_date_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Импортируем необходимые функции
     from src.utils.date_helpers import parse_user_date, is_valid_entry_date, format_date_for_user
-    from src.data.storage import get_user_entries
 
     # Парсим введенную дату
     parsed_date = parse_user_date(date_input)
@@ -301,7 +452,7 @@ async def manual_date_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Подготовка сообщения о замене существующей записи
     replace_message = get_replacement_message(parsed_date) if entry_exists else ""
 
-    logger.info(f"Пользователь {chat_id} ввел дату для записи: {parsed_date}")
+    logger.info("Пользователь %s ввел дату для записи: %s", chat_id, parsed_date)
 
     formatted_date = format_date_for_user(parsed_date, include_day_name=True)
     await update.message.reply_text(
@@ -319,7 +470,7 @@ async def custom_cancel_date(update: Update, context: ContextTypes.DEFAULT_TYPE)
     Локальный обработчик отмены для диалога с выбором даты.
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Отмена диалога добавления записи с датой для пользователя {chat_id}")
+    logger.info("Отмена диалога добавления записи с датой для пользователя %s", chat_id)
 
     # Завершение диалога в менеджере
     end_conversation(chat_id, HANDLER_DATE_NAME)
@@ -328,69 +479,22 @@ async def custom_cancel_date(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if 'entry' in context.user_data:
         context.user_data.pop('entry')
 
-    await update.message.reply_text(
-        "Добавление записи отменено.",
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, "Добавление записи отменено.")
 
     return ConversationHandler.END
 
 
-# Дублированные функции для обработчика с выбором даты
-# Эти функции идентичны оригинальным, но используют HANDLER_DATE_NAME
-
-async def mood_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку настроения и запрашивает оценку сна (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
+# Обработчики для диалога с выбором даты
+# Идентичны стандартным, но используют HANDLER_DATE_NAME
 
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, SLEEP)
-
-    # Валидация ввода с использованием централизованной функции
-    is_valid, value = validate_numeric_input(text, min_val=1, max_val=10)
-    if not is_valid:
-        await update.message.reply_text(
-            get_validation_error_message("настроение"),
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return MOOD
-
-    logger.debug(f"Пользователь {chat_id} установил настроение: {value}")
-    context.user_data['entry']['mood'] = str(value)
-
-    await update.message.reply_text(
-        "Оцените качество вашего сна от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return SLEEP
-
-
-async def sleep_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку сна и запрашивает комментарий к записи (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, COMMENT)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return SLEEP
-
-    logger.debug(f"Пользователь {chat_id} установил качество сна: {text}")
-    context.user_data['entry']['sleep'] = text
-
-    await update.message.reply_text(
-        "Введите комментарий к записи (можно пропустить, отправив символ '-'):\n"
-        "(Чтобы отменить процесс, нажмите /cancel)",
-        reply_markup=ReplyKeyboardRemove()
-    )
-    return COMMENT
+mood_with_date = _make_rating_step(HANDLER_DATE_NAME, 'mood')
+sleep_with_date = _make_rating_step(HANDLER_DATE_NAME, 'sleep')
+balance_with_date = _make_rating_step(HANDLER_DATE_NAME, 'balance')
+mania_with_date = _make_rating_step(HANDLER_DATE_NAME, 'mania')
+depression_with_date = _make_rating_step(HANDLER_DATE_NAME, 'depression')
+anxiety_with_date = _make_rating_step(HANDLER_DATE_NAME, 'anxiety')
+irritability_with_date = _make_rating_step(HANDLER_DATE_NAME, 'irritability')
+productivity_with_date = _make_rating_step(HANDLER_DATE_NAME, 'productivity')
 
 
 async def comment_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -401,13 +505,13 @@ async def comment_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Обновление состояния в менеджере диалогов
     register_conversation(chat_id, HANDLER_DATE_NAME, BALANCE)
 
-    # Сохранение комментария (или None, если введен символ '-')
-    if text == '-':
-        context.user_data['entry']['comment'] = None
-        logger.debug(f"Пользователь {chat_id} пропустил комментарий")
+    # Сохранение комментария (или None, если введен символ '-' или пустой текст)
+    entry_comment = _parse_comment(text)
+    context.user_data['entry']['comment'] = entry_comment
+    if entry_comment is None:
+        logger.debug("Пользователь %s пропустил комментарий", chat_id)
     else:
-        context.user_data['entry']['comment'] = text
-        logger.debug(f"Пользователь {chat_id} добавил комментарий")
+        logger.debug("Пользователь %s добавил комментарий", chat_id)
 
     await update.message.reply_text(
         "Оцените ровность настроения от 1 до 10:",
@@ -416,160 +520,34 @@ async def comment_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return BALANCE
 
 
-async def balance_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку ровности настроения и запрашивает уровень мании (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, MANIA)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return BALANCE
-
-    logger.debug(f"Пользователь {chat_id} установил ровность настроения: {text}")
-    context.user_data['entry']['balance'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень мании от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return MANIA
-
-
-async def mania_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня мании и запрашивает уровень депрессии (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, DEPRESSION)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return MANIA
-
-    logger.debug(f"Пользователь {chat_id} установил уровень мании: {text}")
-    context.user_data['entry']['mania'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень депрессии от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return DEPRESSION
-
-
-async def depression_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня депрессии и запрашивает уровень тревоги (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, ANXIETY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return DEPRESSION
-
-    logger.debug(f"Пользователь {chat_id} установил уровень депрессии: {text}")
-    context.user_data['entry']['depression'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень тревоги от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return ANXIETY
-
-
-async def anxiety_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня тревоги и запрашивает уровень раздражительности (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, IRRITABILITY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return ANXIETY
-
-    logger.debug(f"Пользователь {chat_id} установил уровень тревоги: {text}")
-    context.user_data['entry']['anxiety'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень раздражительности от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return IRRITABILITY
-
+async def _save_entry_and_reply(update: Update, context: ContextTypes.DEFAULT_TYPE, summary: str) -> None:
+    """
+    Сохраняет запись и отправляет пользователю сводку.
+    Сохранение (шифрование и запись в БД) выполняется в отдельном потоке
+    параллельно с отправкой сводки и не блокирует цикл событий.
+    Транзакции из разных потоков сериализует storage (_db_lock).
 
-async def irritability_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня раздражительности и запрашивает уровень работоспособности (для диалога с датой)."""
-    text = update.message.text
+    Args:
+        update: объект с информацией о сообщении
+        context: контекст бота
+        summary: сводка записи для пользователя
+    """
     chat_id = update.effective_chat.id
+    entry_data = context.user_data['entry']
 
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, PRODUCTIVITY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return IRRITABILITY
-
-    logger.debug(f"Пользователь {chat_id} установил уровень раздражительности: {text}")
-    context.user_data['entry']['irritability'] = text
-
-    await update.message.reply_text(
-        "Оцените вашу работоспособность от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
+    saved, _ = await asyncio.gather(
+        asyncio.to_thread(save_data, entry_data, chat_id),
+        reply_main(update.message, summary)
     )
-    return PRODUCTIVITY
-
-
-async def productivity_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку работоспособности и запрашивает уровень общительности (для диалога с датой)."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_DATE_NAME, SOCIABILITY)
 
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
+    if saved:
+        logger.info("Запись успешно сохранена для пользователя %s за дату %s", chat_id, entry_data.get('date'))
+    else:
+        logger.error("Ошибка при сохранении данных для пользователя %s", chat_id)
+        await reply_main(
+            update.message,
+            "Не удалось сохранить запись. Пожалуйста, попробуйте добавить ее снова."
         )
-        return PRODUCTIVITY
-
-    logger.debug(f"Пользователь {chat_id} установил уровень работоспособности: {text}")
-    context.user_data['entry']['productivity'] = text
-
-    await update.message.reply_text(
-        "Оцените вашу общительность от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return SOCIABILITY
 
 
 async def sociability_with_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -577,37 +555,26 @@ async def sociability_with_date(update: Update, context: ContextTypes.DEFAULT_TY
     text = update.message.text
     chat_id = update.effective_chat.id
 
-    # Завершение диалога в менеджере диалогов
-    end_conversation(chat_id, HANDLER_DATE_NAME)
-
     # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
+    if text not in _VALID_RATINGS:
+        logger.debug("Пользователь %s ввел недопустимое значение (уровень общительности): %r", chat_id, text)
         await update.message.reply_text(
             "Пожалуйста, введите число от 1 до 10:",
             reply_markup=NUMERIC_KEYBOARD
         )
         return SOCIABILITY
 
-    logger.debug(f"Пользователь {chat_id} установил уровень общительности: {text}")
-    context.user_data['entry']['sociability'] = text
+    # Завершение диалога в менеджере диалогов
+    end_conversation(chat_id, HANDLER_DATE_NAME)
+
+    logger.debug("Пользователь %s установил уровень общительности: %s", chat_id, text)
+    context.user_data['entry']['sociability'] = int(text)
 
     # Получаем дату записи из контекста
     entry_date = context.user_data['entry'].get('date')
-    
-    # Проверяем, есть ли уже запись за эту дату
-    from src.data.storage import get_user_entries
-    entries = get_user_entries(chat_id)
-    entry_replaced = False
-    for entry in entries:
-        if entry.get('date') == entry_date:
-            entry_replaced = True
-            break
 
-    # Сохранение полной записи для этого пользователя
-    if not save_data(context.user_data['entry'], chat_id):
-        logger.info(f"Произошла ошибка при сохранении данных для пользователя {chat_id}")
-    else:
-        logger.info(f"Запись успешно сохранена для пользователя {chat_id} за дату {entry_date}")
+    # Проверяем, есть ли уже запись за эту дату (до сохранения новой)
+    entry_replaced = await asyncio.to_thread(check_entry_exists, chat_id, entry_date)
 
     # Генерация сводки записи для отображения пользователю
     summary = format_entry_summary(context.user_data['entry'])
@@ -619,7 +586,7 @@ async def sociability_with_date(update: Update, context: ContextTypes.DEFAULT_TY
         replaced_message = f"Предыдущая запись за {formatted_date} была заменена новой.\n\n"
         summary = replaced_message + summary
 
-    await update.message.reply_text(summary, reply_markup=MAIN_KEYBOARD)
+    await _save_entry_and_reply(update, context, summary)
 
     # Очистка данных пользователя
     context.user_data.clear()
@@ -633,37 +600,35 @@ def register(application: Application):
     """
     global entry_conversation_handler, entry_date_conversation_handler
 
-    # Создаем новые обработчики для всех состояний с улучшенными фильтрами
-    # Обратите внимание на ~filters.TEXT в фильтрах - это предотвращает перехват всех текстовых сообщений
-
-    # Каждый обработчик теперь проверяет, что пользователь находится в нужном состоянии
-    # Фильтр для каждого состояния проверяет только числа от 1 до 10 или конкретный формат ввода
-    mood_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), mood)
-    sleep_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), sleep)
-    comment_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, comment)
-    balance_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), balance)
-    mania_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), mania)
-    depression_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), depression)
-    anxiety_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), anxiety)
-    irritability_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), irritability)
-    productivity_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), productivity)
-    sociability_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), sociability)
+    # Создаем новые обработчики для всех состояний с общими фильтрами
+    # (TEXT_NO_COMMAND_FILTER не перехватывает команды, RATING_FILTER пропускает
+    # только числа от 1 до 10)
+    mood_handler = MessageHandler(RATING_FILTER, mood)
+    sleep_handler = MessageHandler(RATING_FILTER, sleep)
+    comment_handler = MessageHandler(TEXT_NO_COMMAND_FILTER, comment)
+    balance_handler = MessageHandler(RATING_FILTER, balance)
+    mania_handler = MessageHandler(RATING_FILTER, mania)
+    depression_handler = MessageHandler(RATING_FILTER, depression)
+    anxiety_handler = MessageHandler(RATING_FILTER, anxiety)
+    irritability_handler = MessageHandler(RATING_FILTER, irritability)
+    productivity_handler = MessageHandler(RATING_FILTER, productivity)
+    sociability_handler = MessageHandler(RATING_FILTER, sociability)
 
     # Обработчики для диалога с выбором даты
-    mood_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), mood_with_date)
-    sleep_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), sleep_with_date)
-    comment_date_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, comment_with_date)
-    balance_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), balance_with_date)
-    mania_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), mania_with_date)
-    depression_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), depression_with_date)
-    anxiety_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), anxiety_with_date)
-    irritability_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), irritability_with_date)
-    productivity_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), productivity_with_date)
-    sociability_date_handler = MessageHandler((filters.TEXT & ~filters.COMMAND) & filters.Regex(r'^([1-9]|10)$'), sociability_with_date)
+    mood_date_handler = MessageHandler(RATING_FILTER, mood_with_date)
+    sleep_date_handler = MessageHandler(RATING_FILTER, sleep_with_date)
+    comment_date_handler = MessageHandler(TEXT_NO_COMMAND_FILTER, comment_with_date)
+    balance_date_handler = MessageHandler(RATING_FILTER, balance_with_date)
+    mania_date_handler = MessageHandler(RATING_FILTER, mania_with_date)
+    depression_date_handler = MessageHandler(RATING_FILTER, depression_with_date)
+    anxiety_date_handler = MessageHandler(RATING_FILTER, anxiety_with_date)
+    irritability_date_handler = MessageHandler(RATING_FILTER, irritability_with_date)
+    productivity_date_handler = MessageHandler(RATING_FILTER, productivity_with_date)
+    sociability_date_handler = MessageHandler(RATING_FILTER, sociability_with_date)
 
     # Обработчики для выбора даты
     date_selection_handler = CallbackQueryHandler(select_date, pattern=r'^date_(yesterday|2days|3days|week|manual)$')
-    manual_date_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, manual_date_input)
+    manual_date_handler = MessageHandler(TEXT_NO_COMMAND_FILTER, manual_date_input)
 
     # Создание обработчика разговора для процесса добавления записи (стандартный)
     entry_conversation_handler = ConversationHandler(
@@ -682,9 +647,11 @@ def register(application: Application):
             IRRITABILITY: [irritability_handler],
             PRODUCTIVITY: [productivity_handler],
             SOCIABILITY: [sociability_handler],
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, _make_timeout_callback(HANDLER_NAME))],
         },
         fallbacks=[CommandHandler("cancel", custom_cancel)],
         name=HANDLER_NAME,
+        conversation_timeout=CONVERSATION_TIMEOUT,
         persistent=False,  # Не сохраняем состояние между перезапусками
         allow_reentry=True,  # Позволяем повторный вход
     )
@@ -705,9 +672,11 @@ def register(application: Application):
             IRRITABILITY: [irritability_date_handler],
             PRODUCTIVITY: [productivity_date_handler],
             SOCIABILITY: [sociability_date_handler],
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, _make_timeout_callback(HANDLER_DATE_NAME))],
         },
         fallbacks=[CommandHandler("cancel", custom_cancel_date)],
         name=HANDLER_DATE_NAME,
+        conversation_timeout=CONVERSATION_TIMEOUT,
         persistent=False,  # Не сохраняем состояние между перезапусками
         allow_reentry=True,  # Позволяем повторный вход
     )
@@ -716,7 +685,7 @@ def register(application: Application):
     for handler in application.handlers.get(0, [])[:]:
         if isinstance(handler, ConversationHandler) and getattr(handler, 'name', None) in [HANDLER_NAME, HANDLER_DATE_NAME]:
             application.remove_handler(handler)
-            logger.info(f"Удален старый обработчик диалога {getattr(handler, 'name', 'unknown')}")
+            logger.info("Удален старый обработчик диалога %s", getattr(handler, 'name', 'unknown'))
 
     # Добавляем новые обработчики
     application.add_handler(entry_conversation_handler)
@@ -724,58 +693,15 @@ def register(application: Application):
     logger.info("Обработчики для добавления записей зарегистрированы")
 
 
-
-async def mood(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку настроения и запрашивает оценку сна."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, SLEEP)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return MOOD
-
-    logger.debug(f"Пользователь {chat_id} установил настроение: {text}")
-    context.user_data['entry']['mood'] = text
-
-    await update.message.reply_text(
-        "Оцените качество вашего сна от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return SLEEP
-
-
-async def sleep(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку сна и запрашивает комментарий к записи."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, COMMENT)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return SLEEP
-
-    logger.debug(f"Пользователь {chat_id} установил качество сна: {text}")
-    context.user_data['entry']['sleep'] = text
-
-    await update.message.reply_text(
-        "Введите комментарий к записи (можно пропустить, отправив символ '-'):\n"
-        "(Чтобы отменить процесс, нажмите /cancel)",
-        reply_markup=ReplyKeyboardRemove()
-    )
-    return COMMENT
+# Обработчики числовых показателей для стандартного диалога
+mood = _make_rating_step(HANDLER_NAME, 'mood')
+sleep = _make_rating_step(HANDLER_NAME, 'sleep')
+balance = _make_rating_step(HANDLER_NAME, 'balance')
+mania = _make_rating_step(HANDLER_NAME, 'mania')
+depression = _make_rating_step(HANDLER_NAME, 'depression')
+anxiety = _make_rating_step(HANDLER_NAME, 'anxiety')
+irritability = _make_rating_step(HANDLER_NAME, 'irritability')
+productivity = _make_rating_step(HANDLER_NAME, 'productivity')
 
 
 async def comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -786,13 +712,13 @@ async def comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Обновление состояния в менеджере диалогов
     register_conversation(chat_id, HANDLER_NAME, BALANCE)
 
-    # Сохранение комментария (или None, если введен символ '-')
-    if text == '-':
-        context.user_data['entry']['comment'] = None
-        logger.debug(f"Пользователь {chat_id} пропустил комментарий")
+    # Сохранение комментария (или None, если введен символ '-' или пустой текст)
+    entry_comment = _parse_comment(text)
+    context.user_data['entry']['comment'] = entry_comment
+    if entry_comment is None:
+        logger.debug("Пользователь %s пропустил комментарий", chat_id)
     else:
-        context.user_data['entry']['comment'] = text
-        logger.debug(f"Пользователь {chat_id} добавил комментарий")
+        logger.debug("Пользователь %s добавил комментарий", chat_id)
 
     await update.message.reply_text(
         "Оцените ровность настроения от 1 до 10:",
@@ -801,195 +727,28 @@ async def comment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return BALANCE
 
 
-async def balance(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку ровности настроения и запрашивает уровень мании."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, MANIA)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return BALANCE
-
-    logger.debug(f"Пользователь {chat_id} установил ровность настроения: {text}")
-    context.user_data['entry']['balance'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень мании от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return MANIA
-
-
-async def mania(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня мании и запрашивает уровень депрессии."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, DEPRESSION)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return MANIA
-
-    logger.debug(f"Пользователь {chat_id} установил уровень мании: {text}")
-    context.user_data['entry']['mania'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень депрессии от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return DEPRESSION
-
-
-async def depression(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня депрессии и запрашивает уровень тревоги."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, ANXIETY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return DEPRESSION
-
-    logger.debug(f"Пользователь {chat_id} установил уровень депрессии: {text}")
-    context.user_data['entry']['depression'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень тревоги от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return ANXIETY
-
-
-async def anxiety(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня тревоги и запрашивает уровень раздражительности."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, IRRITABILITY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return ANXIETY
-
-    logger.debug(f"Пользователь {chat_id} установил уровень тревоги: {text}")
-    context.user_data['entry']['anxiety'] = text
-
-    await update.message.reply_text(
-        "Оцените уровень раздражительности от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return IRRITABILITY
-
-
-async def irritability(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку уровня раздражительности и запрашивает уровень работоспособности."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, PRODUCTIVITY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return IRRITABILITY
-
-    logger.debug(f"Пользователь {chat_id} установил уровень раздражительности: {text}")
-    context.user_data['entry']['irritability'] = text
-
-    await update.message.reply_text(
-        "Оцените вашу работоспособность от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return PRODUCTIVITY
-
-
-async def productivity(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Сохраняет оценку работоспособности и запрашивает уровень общительности."""
-    text = update.message.text
-    chat_id = update.effective_chat.id
-
-    # Обновление состояния в менеджере диалогов
-    register_conversation(chat_id, HANDLER_NAME, SOCIABILITY)
-
-    # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
-        await update.message.reply_text(
-            "Пожалуйста, введите число от 1 до 10:",
-            reply_markup=NUMERIC_KEYBOARD
-        )
-        return PRODUCTIVITY
-
-    logger.debug(f"Пользователь {chat_id} установил уровень работоспособности: {text}")
-    context.user_data['entry']['productivity'] = text
-
-    await update.message.reply_text(
-        "Оцените вашу общительность от 1 до 10:",
-        reply_markup=NUMERIC_KEYBOARD
-    )
-    return SOCIABILITY
-
-
 async def sociability(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Сохраняет оценку общительности и завершает ввод записи."""
     text = update.message.text
     chat_id = update.effective_chat.id
 
-    # Завершение диалога в менеджере диалогов
-    end_conversation(chat_id, HANDLER_NAME)
-
     # Валидация ввода (должно быть число от 1 до 10)
-    if not text.isdigit() or int(text) < 1 or int(text) > 10:
+    if text not in _VALID_RATINGS:
+        logger.debug("Пользователь %s ввел недопустимое значение (уровень общительности): %r", chat_id, text)
         await update.message.reply_text(
             "Пожалуйста, введите число от 1 до 10:",
             reply_markup=NUMERIC_KEYBOARD
         )
         return SOCIABILITY
 
-    logger.debug(f"Пользователь {chat_id} установил уровень общительности: {text}")
-    context.user_data['entry']['sociability'] = text
+    # Завершение диалога в менеджере диалогов
+    end_conversation(chat_id, HANDLER_NAME)
 
-    # Проверяем, есть ли уже запись за сегодня
-    today = get_today()
-    entries = get_user_entries(chat_id)
-    entry_replaced = False
-    for entry in entries:
-        if entry.get('date') == today:
-            entry_replaced = True
-            break
+    logger.debug("Пользователь %s установил уровень общительности: %s", chat_id, text)
+    context.user_data['entry']['sociability'] = int(text)
 
-    # Сохранение полной записи для этого пользователя
-    if not save_data(context.user_data['entry'], chat_id):
-        logger.info(f"Произошла ошибка при сохранении данных для пользователя {chat_id}")
-    else:
-        logger.info(f"Запись успешно сохранена для пользователя {chat_id}")
+    # Проверяем, есть ли уже запись за сегодня (до сохранения новой)
+    entry_replaced = await asyncio.to_thread(check_entry_exists, chat_id, get_today())
 
     # Генерация сводки записи для отображения пользователю
     summary = format_entry_summary(context.user_data['entry'])
@@ -999,7 +758,7 @@ async def sociability(update: Update, context: ContextTypes.DEFAULT_TYPE):
         replaced_message = "Предыдущая запись за сегодня была заменена новой.\n\n"
         summary = replaced_message + summary
 
-    await update.message.reply_text(summary, reply_markup=MAIN_KEYBOARD)
+    await _save_entry_and_reply(update, context, summary)
 
     # Очистка данных пользователя
     context.user_data.clear()
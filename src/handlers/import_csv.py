@@ -13,7 +13,7 @@ from telegram.ext import (
 )
 
 from src.config import IMPORT_CSV_FILE, IMPORT_CSV_CONFIRM
-from src.utils.keyboards import MAIN_KEYBOARD
+from src.utils.keyboards import reply_main
 from src.data.storage import save_data
 from src.utils.conversation_manager import register_conversation, end_conversation, end_all_conversations
 
@@ -32,7 +32,7 @@ async def custom_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Локальный обработчик отмены для этого диалога.
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Отмена импорта CSV для пользователя {chat_id}")
+    logger.info("Отмена импорта CSV для пользователя %s", chat_id)
 
     # Завершение диалога в менеджере
     end_conversation(chat_id, HANDLER_NAME)
@@ -43,10 +43,7 @@ async def custom_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if 'import_filename' in context.user_data:
         context.user_data.pop('import_filename')
 
-    await update.message.reply_text(
-        "Импорт CSV отменен.",
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, "Импорт CSV отменен.")
 
     return ConversationHandler.END
 
@@ -63,7 +60,7 @@ async def start_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Регистрируем новый активный диалог
     register_conversation(chat_id, HANDLER_NAME, IMPORT_CSV_FILE)
 
-    logger.info(f"Пользователь {chat_id} начал процесс импорта CSV")
+    logger.info("Пользователь %s начал процесс импорта CSV", chat_id)
 
     await update.message.reply_text(
         "Вы начали процесс импорта данных из CSV-файла.\n\n"
@@ -123,7 +120,7 @@ async def process_csv_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
             csv_io.seek(0)
             df = pd.read_csv(csv_io, encoding='windows-1251')
 
-        logger.info(f"Успешно прочитан CSV-файл с {len(df)} строками")
+        logger.info("Успешно прочитан CSV-файл с %s строками", len(df))
 
         # Проверка обязательных колонок
         required_columns = ['date', 'mood', 'sleep', 'balance', 'mania',
@@ -193,7 +190,7 @@ async def process_csv_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return IMPORT_CSV_CONFIRM
 
     except Exception as e:
-        logger.error(f"Ошибка при обработке CSV-файла: {e}")
+        logger.error("Ошибка при обработке CSV-файла: %s", e)
         await update.message.reply_text(
             f"Произошла ошибка при обработке файла: {str(e)}\n"
             "Пожалуйста, убедитесь, что файл имеет правильный формат и попробуйте снова."
@@ -212,19 +209,13 @@ async def confirm_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
     end_conversation(chat_id, HANDLER_NAME)
 
     if text != 'да' and text != 'yes':
-        await update.message.reply_text(
-            "Импорт отменен.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, "Импорт отменен.")
         return ConversationHandler.END
 
     # Получение DataFrame из контекста
     df = context.user_data.get('import_df')
     if df is None:
-        await update.message.reply_text(
-            "Произошла ошибка: данные для импорта не найдены.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, "Произошла ошибка: данные для импорта не найдены.")
         return ConversationHandler.END
 
     # Импорт записей
@@ -240,12 +231,12 @@ async def confirm_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Преобразование строки pandas в словарь
         entry = row.to_dict()
 
-        # Преобразование числовых значений в строки (как ожидает метод save_data)
+        # Числовые показатели сохраняются как int, как и при вводе через /add
         numeric_columns = ['mood', 'sleep', 'balance', 'mania', 'depression',
                           'anxiety', 'irritability', 'productivity', 'sociability']
 
         for col in numeric_columns:
-            entry[col] = str(int(entry[col]))
+            entry[col] = int(entry[col])
 
         # Сохранение записи
         if save_data(entry, chat_id):
@@ -253,7 +244,7 @@ async def confirm_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
         else:
             failed_imports += 1
 
-    logger.info(f"Пользователь {chat_id} импортировал {successful_imports} записей из CSV")
+    logger.info("Пользователь %s импортировал %s записей из CSV", chat_id, successful_imports)
 
     # Отправка сообщения о результатах
     result_message = (
@@ -266,10 +257,7 @@ async def confirm_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     result_message += "\nТеперь вы можете использовать /stats для просмотра статистики или /visualize для создания графиков."
 
-    await update.message.reply_text(
-        result_message,
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, result_message)
 
     # Очистка данных пользователя
     context.user_data.clear()
@@ -304,7 +292,7 @@ def register(application: Application):
     for handler in application.handlers.get(0, [])[:]:
         if isinstance(handler, ConversationHandler) and getattr(handler, 'name', None) == HANDLER_NAME:
             application.remove_handler(handler)
-            logger.info(f"Удален старый обработчик диалога {HANDLER_NAME}")
+            logger.info("Удален старый обработчик диалога %s", HANDLER_NAME)
 
     # Добавляем новый обработчик
     application.add_handler(import_conversation_handler)
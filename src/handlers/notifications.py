@@ -14,7 +14,7 @@ from telegram.ext import (
 
 
 from src.utils.conversation_manager import register_conversation, end_conversation, end_all_conversations
-from src.utils.keyboards import MAIN_KEYBOARD
+from src.utils.keyboards import MAIN_KEYBOARD, reply_main
 from src.data.storage import save_user, get_users_for_notification, has_entry_for_date
 from src.utils.date_helpers import get_today, is_valid_time_format, local_to_utc
 
@@ -42,7 +42,7 @@ async def notify_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Регистрируем новый активный диалог
     register_conversation(chat_id, HANDLER_NAME, SELECTING_TIMEZONE)
 
-    logger.info(f"Пользователь {chat_id} начал процесс настройки нотификаций")
+    logger.info("Пользователь %s начал процесс настройки нотификаций", chat_id)
 
     def get_utc_inline_keyboard():
         """Создает inline-клавиатуру с кнопками выбора часового пояса UTC-12 до UTC+14."""
@@ -131,15 +131,15 @@ async def time_entered(update: Update, context: ContextTypes.DEFAULT_TYPE):
             notification_time=utc_time_str
         )
 
-        await update.message.reply_text(
+        await reply_main(
+            update.message,
             f"✅ Уведомления настроены на {time_str} (UTC{offset:+}) каждый день.\n"
-            f"Будут отправляться в {utc_time_str} по UTC.",
-            reply_markup=MAIN_KEYBOARD
+            f"Будут отправляться в {utc_time_str} по UTC."
         )
 
     except Exception as e:
         await update.message.reply_text("Произошла ошибка при обработке времени.")
-        logger.error(f"Не удалось настроить уведомление для {chat_id}: {e}")
+        logger.error("Не удалось настроить уведомление для %s: %s", chat_id, e)
 
     end_conversation(chat_id, HANDLER_NAME)
     return ConversationHandler.END
@@ -164,12 +164,9 @@ async def cancel_notify_command(update: Update, context: ContextTypes.DEFAULT_TY
     # Установка времени уведомления в None
     save_user(chat_id, username, first_name, notification_time=None)
 
-    logger.info(f"Пользователь {chat_id} отключил уведомления")
+    logger.info("Пользователь %s отключил уведомления", chat_id)
 
-    await update.effective_message.reply_text(
-        "❌ Ежедневные уведомления отключены.",
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.effective_message, "❌ Ежедневные уведомления отключены.")
     return ConversationHandler.END
 
 
@@ -220,9 +217,9 @@ async def send_notifications(context: ContextTypes.DEFAULT_TYPE):
                 text=message,
                 reply_markup=InlineKeyboardMarkup(keyboard)
             )
-            logger.info(f"Отправлено уведомление пользователю {chat_id}")
+            logger.info("Отправлено уведомление пользователю %s", chat_id)
         except Exception as e:
-            logger.error(f"Не удалось отправить уведомление пользователю {chat_id}: {e}")
+            logger.error("Не удалось отправить уведомление пользователю %s: %s", chat_id, e)
 
 
 async def send_notification_to_user(context: ContextTypes.DEFAULT_TYPE, chat_id: int, custom_message: str = None):
@@ -271,11 +268,11 @@ async def send_notification_to_user(context: ContextTypes.DEFAULT_TYPE, chat_id:
             reply_markup=InlineKeyboardMarkup(keyboard)
         )
         
-        logger.info(f"Принудительно отправлено уведомление пользователю {chat_id}")
+        logger.info("Принудительно отправлено уведомление пользователю %s", chat_id)
         return True
         
     except Exception as e:
-        logger.error(f"Не удалось принудительно отправить уведомление пользователю {chat_id}: {e}")
+        logger.error("Не удалось принудительно отправить уведомление пользователю %s: %s", chat_id, e)
         return False
 
 
@@ -307,7 +304,7 @@ async def send_notifications_to_all(context: ContextTypes.DEFAULT_TYPE, custom_m
         else:
             failed_count += 1
     
-    logger.info(f"Принудительная рассылка завершена: {sent_count}/{total_count} успешно, {failed_count} ошибок")
+    logger.info("Принудительная рассылка завершена: %s/%s успешно, %s ошибок", sent_count, total_count, failed_count)
     
     return {
         "sent": sent_count,
@@ -339,15 +336,9 @@ async def force_notify_command(update: Update, context: ContextTypes.DEFAULT_TYP
     success = await send_notification_to_user(context, chat_id, custom_message)
     
     if success:
-        await update.message.reply_text(
-            "✅ Уведомление отправлено!",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, "✅ Уведомление отправлено!")
     else:
-        await update.message.reply_text(
-            "❌ Не удалось отправить уведомление. Попробуйте позже.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, "❌ Не удалось отправить уведомление. Попробуйте позже.")
     
     return ConversationHandler.END
 
@@ -372,11 +363,11 @@ async def admin_notify_command(update: Update, context: ContextTypes.DEFAULT_TYP
     # Для примера считаем, что любой может использовать (в продакшене нужна проверка)
     
     if not context.args or len(context.args) < 1:
-        await update.message.reply_text(
+        await reply_main(
+            update.message,
             "Использование:\n"
             "/admin_notify all [сообщение] - всем пользователям\n"
-            "/admin_notify user <chat_id> [сообщение] - конкретному пользователю",
-            reply_markup=MAIN_KEYBOARD
+            "/admin_notify user <chat_id> [сообщение] - конкретному пользователю"
         )
         return ConversationHandler.END
     
@@ -392,30 +383,27 @@ async def admin_notify_command(update: Update, context: ContextTypes.DEFAULT_TYP
         
         stats = await send_notifications_to_all(context, custom_message)
         
-        await update.message.reply_text(
+        await reply_main(
+            update.message,
             f"📊 Рассылка завершена:\n"
             f"✅ Отправлено: {stats['sent']}\n"
             f"❌ Ошибок: {stats['failed']}\n"
-            f"📈 Всего: {stats['total']}",
-            reply_markup=MAIN_KEYBOARD
+            f"📈 Всего: {stats['total']}"
         )
         
     elif target == "user":
         # Отправка конкретному пользователю
         if len(context.args) < 2:
-            await update.message.reply_text(
-                "Укажите chat_id пользователя: /admin_notify user <chat_id> [сообщение]",
-                reply_markup=MAIN_KEYBOARD
+            await reply_main(
+                update.message,
+                "Укажите chat_id пользователя: /admin_notify user <chat_id> [сообщение]"
             )
             return ConversationHandler.END
         
         try:
             target_chat_id = int(context.args[1])
         except ValueError:
-            await update.message.reply_text(
-                "Неверный формат chat_id. Используйте числовой ID.",
-                reply_markup=MAIN_KEYBOARD
-            )
+            await reply_main(update.message, "Неверный формат chat_id. Используйте числовой ID.")
             return ConversationHandler.END
         
         custom_message = None
@@ -425,20 +413,14 @@ async def admin_notify_command(update: Update, context: ContextTypes.DEFAULT_TYP
         success = await send_notification_to_user(context, target_chat_id, custom_message)
         
         if success:
-            await update.message.reply_text(
-                f"✅ Уведомление отправлено пользователю {target_chat_id}",
-                reply_markup=MAIN_KEYBOARD
-            )
+            await reply_main(update.message, f"✅ Уведомление отправлено пользователю {target_chat_id}")
         else:
-            await update.message.reply_text(
-                f"❌ Не удалось отправить уведомление пользователю {target_chat_id}",
-                reply_markup=MAIN_KEYBOARD
+            await reply_main(
+                update.message,
+                f"❌ Не удалось отправить уведомление пользователю {target_chat_id}"
             )
     else:
-        await update.message.reply_text(
-            "Неизвестная команда. Используйте 'all' или 'user'.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, "Неизвестная команда. Используйте 'all' или 'user'.")
     
     return ConversationHandler.END
 
@@ -469,7 +451,7 @@ async def notification_callback(update: Update, context: ContextTypes.DEFAULT_TY
             reply_markup=MAIN_KEYBOARD
         )
 
-        logger.info(f"Пользователь {chat_id} отключил уведомления через кнопку в уведомлении")
+        logger.info("Пользователь %s отключил уведомления через кнопку в уведомлении", chat_id)
 
 
 def setup_job_queue(job_queue):
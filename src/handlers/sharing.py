@@ -15,7 +15,8 @@ from telegram.ext import (
     MessageHandler, filters, CallbackQueryHandler, Application
 )
 
-from src.utils.keyboards import MAIN_KEYBOARD
+from src.utils.keyboards import reply_main
+from src.utils.formatters import NO_ENTRIES_MESSAGE
 from src.data.storage import get_user_entries, ensure_user_exists
 from src.data.encryption import encrypt_for_sharing, decrypt_shared_data
 from src.utils.conversation_manager import register_conversation, end_conversation, end_all_conversations
@@ -75,7 +76,7 @@ async def custom_cancel_send(update: Update, context: ContextTypes.DEFAULT_TYPE)
     Локальный обработчик отмены для диалога отправки дневника.
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Отмена отправки дневника для пользователя {chat_id}")
+    logger.info("Отмена отправки дневника для пользователя %s", chat_id)
 
     # Завершение диалога в менеджере
     end_conversation(chat_id, SEND_HANDLER_NAME)
@@ -88,10 +89,7 @@ async def custom_cancel_send(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if 'sharing_password' in context.user_data:
         context.user_data.pop('sharing_password')
 
-    await update.message.reply_text(
-        "Отправка дневника отменена.",
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, "Отправка дневника отменена.")
 
     return ConversationHandler.END
 
@@ -101,15 +99,12 @@ async def custom_cancel_view(update: Update, context: ContextTypes.DEFAULT_TYPE)
     Локальный обработчик отмены для диалога просмотра дневника.
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Отмена просмотра дневника для пользователя {chat_id}")
+    logger.info("Отмена просмотра дневника для пользователя %s", chat_id)
 
     # Завершение диалога в менеджере
     end_conversation(chat_id, VIEW_HANDLER_NAME)
 
-    await update.message.reply_text(
-        "Просмотр дневника отменен.",
-        reply_markup=MAIN_KEYBOARD
-    )
+    await reply_main(update.message, "Просмотр дневника отменен.")
 
     return ConversationHandler.END
 
@@ -126,7 +121,7 @@ async def send_diary_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Регистрируем новый активный диалог
     register_conversation(chat_id, SEND_HANDLER_NAME, SEND_DIARY_USER_ID)
 
-    logger.info(f"Пользователь {chat_id} начал процесс отправки дневника")
+    logger.info("Пользователь %s начал процесс отправки дневника", chat_id)
 
     # Проверка наличия записей у пользователя через оптимизированный API
     entries = get_user_entries(chat_id)
@@ -135,10 +130,7 @@ async def send_diary_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Завершаем диалог, так как у пользователя нет записей
         end_conversation(chat_id, SEND_HANDLER_NAME)
 
-        await update.message.reply_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, NO_ENTRIES_MESSAGE)
         return ConversationHandler.END
 
     await update.message.reply_text(
@@ -164,7 +156,7 @@ async def send_diary_user_id(update: Update, context: ContextTypes.DEFAULT_TYPE)
     try:
         recipient_id = int(text)
         context.user_data['recipient_id'] = recipient_id
-        logger.info(f"Пользователь {chat_id} указал получателя: {recipient_id}")
+        logger.info("Пользователь %s указал получателя: %s", chat_id, recipient_id)
 
         # Создание кнопок выбора диапазона дат
         keyboard = create_date_range_keyboard()
@@ -217,10 +209,7 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
     recipient_id = context.user_data.get('recipient_id')
 
     if not recipient_id:
-        await query.message.reply_text(
-            "Произошла ошибка: ID получателя не найден.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(query.message, "Произошла ошибка: ID получателя не найден.")
         return ConversationHandler.END
 
     # Удаляем префикс из callback_data
@@ -229,7 +218,7 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
         callback_data = callback_data[len(SHARE_PREFIX):]
 
     # Логирование для отладки
-    logger.info(f"Обрабатываем диапазон дат: {callback_data}")
+    logger.info("Обрабатываем диапазон дат: %s", callback_data)
 
     # Сохранение выбранного диапазона дат
     context.user_data['selected_date_range'] = callback_data
@@ -254,10 +243,7 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
             "Не удалось получить или расшифровать записи.",
             reply_markup=None
         )
-        await query.message.reply_text(
-            "Произошла ошибка при подготовке данных.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(query.message, "Произошла ошибка при подготовке данных.")
         return ConversationHandler.END
 
     try:
@@ -272,17 +258,17 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
         if date_range == "date_range_all":
             # Использовать все данные
             filtered_df = entries_df
-            logger.info(f"Используем все записи: {len(filtered_df)} записей")
+            logger.info("Используем все записи: %s записей", len(filtered_df))
         else:
             # Проверка формата строки date_range
             if not date_range.startswith("date_range_"):
-                logger.error(f"Неверный формат диапазона дат: {date_range}")
+                logger.error("Неверный формат диапазона дат: %s", date_range)
                 raise ValueError("Неверный формат диапазона дат")
 
             # Извлечение дат из данных обратного вызова
             parts = date_range.split('_')
             if len(parts) < 3:
-                logger.error(f"Недостаточно частей в строке диапазона: {date_range}")
+                logger.error("Недостаточно частей в строке диапазона: %s", date_range)
                 raise ValueError("Недостаточно частей в строке диапазона")
 
             # Извлекаем даты, учитывая, что после разделения могут быть дополнительные части
@@ -290,7 +276,7 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
             # Последняя часть - это конечная дата
             end_date = parts[3] if len(parts) > 3 else datetime.now().strftime('%Y-%m-%d')
 
-            logger.info(f"Извлеченные даты: с {start_date} по {end_date}")
+            logger.info("Извлеченные даты: с %s по %s", start_date, end_date)
 
             # Конвертируем столбец даты в datetime перед фильтрацией
             if 'date' in entries_df.columns:
@@ -300,13 +286,13 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 try:
                     start_dt = pd.to_datetime(start_date)
                     end_dt = pd.to_datetime(end_date)
-                    logger.info(f"Преобразованные даты: с {start_dt} по {end_dt}")
+                    logger.info("Преобразованные даты: с %s по %s", start_dt, end_dt)
 
                     # Фильтрация по дате
                     filtered_df = entries_df[(entries_df['date'] >= start_dt) & (entries_df['date'] <= end_dt)]
-                    logger.info(f"Отфильтровано {len(filtered_df)} записей из {len(entries_df)}")
+                    logger.info("Отфильтровано %s записей из %s", len(filtered_df), len(entries_df))
                 except Exception as e:
-                    logger.error(f"Ошибка при преобразовании дат: {e}")
+                    logger.error("Ошибка при преобразовании дат: %s", e)
                     filtered_df = entries_df  # Используем все данные в случае ошибки
             else:
                 logger.warning("Колонка 'date' не найдена в данных")
@@ -317,10 +303,7 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 "За выбранный период нет данных для отправки.",
                 reply_markup=None
             )
-            await query.message.reply_text(
-                "Выберите другой период или добавьте записи.",
-                reply_markup=MAIN_KEYBOARD
-            )
+            await reply_main(query.message, "Выберите другой период или добавьте записи.")
             return ConversationHandler.END
 
         # Обновляем статусное сообщение
@@ -366,26 +349,26 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 f"Дневник успешно отправлен пользователю {recipient_id}!"
             )
 
-            await query.message.reply_text(
+            await reply_main(
+                query.message,
                 f"Сообщите получателю пароль '{sharing_password}' для доступа к данным. "
-                f"Этот пароль будет нужен получателю при использовании команды /view_shared.",
-                reply_markup=MAIN_KEYBOARD
+                f"Этот пароль будет нужен получателю при использовании команды /view_shared."
             )
-            logger.info(f"Пользователь {chat_id} успешно отправил дневник пользователю {recipient_id}")
+            logger.info("Пользователь %s успешно отправил дневник пользователю %s", chat_id, recipient_id)
         except Exception as e:
-            logger.error(f"Ошибка при отправке дневника: {str(e)}")
+            logger.error("Ошибка при отправке дневника: %s", str(e))
 
             await status_message.edit_text(
                 "Ошибка при отправке дневника."
             )
 
-            await query.message.reply_text(
-                f"Не удалось отправить дневник. Возможно, указан неверный ID пользователя или пользователь заблокировал бота.\n\nОшибка: {str(e)}",
-                reply_markup=MAIN_KEYBOARD
+            await reply_main(
+                query.message,
+                f"Не удалось отправить дневник. Возможно, указан неверный ID пользователя или пользователь заблокировал бота.\n\nОшибка: {str(e)}"
             )
 
     except Exception as e:
-        logger.error(f"Ошибка при подготовке данных для отправки: {str(e)}")
+        logger.error("Ошибка при подготовке данных для отправки: %s", str(e))
 
         try:
             await status_message.edit_text(
@@ -394,10 +377,7 @@ async def process_date_range(update: Update, context: ContextTypes.DEFAULT_TYPE)
         except:
             pass
 
-        await query.message.reply_text(
-            f"Произошла ошибка при обработке данных: {str(e)}",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(query.message, f"Произошла ошибка при обработке данных: {str(e)}")
 
     return ConversationHandler.END
 
@@ -414,7 +394,7 @@ async def view_shared_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Регистрируем новый активный диалог
     register_conversation(chat_id, VIEW_HANDLER_NAME, SHARE_PASSWORD_ENTRY)
 
-    logger.info(f"Пользователь {chat_id} начал процесс просмотра полученного дневника")
+    logger.info("Пользователь %s начал процесс просмотра полученного дневника", chat_id)
 
     # Обеспечиваем наличие пользователя в базе данных
     ensure_user_exists(chat_id, update.effective_user.username, update.effective_user.first_name)
@@ -442,15 +422,15 @@ async def process_shared_password(update: Update, context: ContextTypes.DEFAULT_
     chat_id = update.effective_chat.id
     end_conversation(chat_id, VIEW_HANDLER_NAME)
 
-    logger.info(f"Пользователь {chat_id} ввел пароль для расшифровки дневника")
+    logger.info("Пользователь %s ввел пароль для расшифровки дневника", chat_id)
 
     # В полной реализации здесь будет расшифровка и отображение общего дневника
     # Для этого примера просто показываем сообщение
-    await update.message.reply_text(
+    await reply_main(
+        update.message,
         "Функция просмотра общих дневников требует обработки загруженных файлов, "
         "что выходит за рамки этого примера. В полной реализации здесь будет "
-        "расшифровка и отображение общего дневника с использованием введенного пароля.",
-        reply_markup=MAIN_KEYBOARD
+        "расшифровка и отображение общего дневника с использованием введенного пароля."
     )
     return ConversationHandler.END
 
@@ -497,7 +477,7 @@ def register(application: Application):
     for handler in application.handlers.get(0, [])[:]:
         if isinstance(handler, ConversationHandler) and getattr(handler, 'name', None) in [SEND_HANDLER_NAME, VIEW_HANDLER_NAME]:
             application.remove_handler(handler)
-            logger.info(f"Удален старый обработчик диалога {getattr(handler, 'name', 'unknown')}")
+            logger.info("Удален старый обработчик диалога %s", getattr(handler, 'name', 'unknown'))
 
     # Добавляем новые обработчики
     application.add_handler(send_conversation_handler)
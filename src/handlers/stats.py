@@ -4,15 +4,17 @@
 Оптимизированная версия для работы с SQLite и старыми версиями telegram-bot.
 """
 
+import asyncio
 import io
 import logging
+from typing import Optional
 import pandas as pd
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler, ConversationHandler, CallbackQueryHandler
 
-from src.utils.keyboards import MAIN_KEYBOARD
+from src.utils.keyboards import reply_main
 from src.data.storage import get_user_entries
-from src.utils.formatters import format_stats_summary
+from src.utils.formatters import format_stats_summary, NO_ENTRIES_MESSAGE
 
 # Настройка логгирования
 logger = logging.getLogger(__name__)
@@ -39,6 +41,27 @@ def prepare_csv_from_entries(entries):
     return csv_bytes
 
 
+def build_stats_text(chat_id: int) -> Optional[str]:
+    """
+    Загружает записи пользователя и формирует текст статистики.
+    Синхронная функция для запуска в отдельном потоке.
+
+    Args:
+        chat_id: ID пользователя в Telegram
+
+    Returns:
+        Optional[str]: текст статистики или None, если записей нет
+    """
+    # Получение записей пользователя через оптимизированный API
+    entries = get_user_entries(chat_id)
+
+    if not entries:
+        return None
+
+    # Преобразование в DataFrame для анализа и форматирование статистики
+    return format_stats_summary(pd.DataFrame(entries))
+
+
 async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Обработчик команды /stats.
@@ -52,35 +75,27 @@ async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         int: состояние ConversationHandler.END
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Пользователь {chat_id} запросил статистику")
+    logger.info("Пользователь %s запросил статистику", chat_id)
 
     # Отправляем сообщение о начале обработки
     status_message = await update.effective_message.reply_text(
         "Обрабатываю данные, это может занять несколько секунд..."
     )
 
-    # Получение записей пользователя через оптимизированный API
-    entries = get_user_entries(chat_id)
+    # Чтение, расшифровка и подсчет статистики (pandas) — в отдельном потоке,
+    # чтобы не блокировать цикл событий
+    stats_text = await asyncio.to_thread(build_stats_text, chat_id)
 
-    if not entries:
+    if stats_text is None:
         await status_message.delete()
-        await update.effective_message.reply_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.effective_message, NO_ENTRIES_MESSAGE)
         return ConversationHandler.END
 
-    # Преобразование в DataFrame для анализа
-    entries_df = pd.DataFrame(entries)
-
-    # Форматирование статистики
-    stats_text = format_stats_summary(entries_df)
-
     # Удаляем сообщение о статусе
     await status_message.delete()
 
     # Отправляем статистику
-    await update.effective_message.reply_text(stats_text, reply_markup=MAIN_KEYBOARD)
+    await reply_main(update.effective_message, stats_text)
     return ConversationHandler.END
 
 
@@ -97,27 +112,24 @@ async def download_diary(update: Update, context: ContextTypes.DEFAULT_TYPE):
         int: состояние ConversationHandler.END
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Пользователь {chat_id} запросил скачивание дневника")
+    logger.info("Пользователь %s запросил скачивание дневника", chat_id)
 
     # Отправляем сообщение о начале обработки
     status_message = await update.message.reply_text(
         "Подготавливаю ваш дневник для скачивания..."
     )
 
-    # Получение расшифрованных записей пользователя через оптимизированный API
-    entries = get_user_entries(chat_id)
+    # Получение расшифрованных записей пользователя (в отдельном потоке)
+    entries = await asyncio.to_thread(get_user_entries, chat_id)
 
     if not entries:
         await status_message.delete()
-        await update.message.reply_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, NO_ENTRIES_MESSAGE)
         return ConversationHandler.END
 
     try:
-        # Подготовка CSV-данных (без использования run_in_executor)
-        csv_bytes = prepare_csv_from_entries(entries)
+        # Подготовка CSV-данных (pandas) в отдельном потоке
+        csv_bytes = await asyncio.to_thread(prepare_csv_from_entries, entries)
 
         # Удаляем сообщение о статусе
         await status_message.delete()
@@ -130,13 +142,10 @@ async def download_diary(update: Update, context: ContextTypes.DEFAULT_TYPE):
             caption="Ваш дневник настроения (расшифрованный)"
         )
 
-        await update.message.reply_text(
-            "Файл с вашим дневником отправлен.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, "Файл с вашим дневником отправлен.")
 
     except Exception as e:
-        logger.error(f"Ошибка при подготовке CSV для пользователя {chat_id}: {e}")
+        logger.error("Ошибка при подготовке CSV для пользователя %s: %s", chat_id, e)
 
         # Удаляем сообщение о статусе
         try:
@@ -144,9 +153,9 @@ async def download_diary(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except:
             pass
 
-        await update.message.reply_text(
-            "Произошла ошибка при подготовке дневника для скачивания. Пожалуйста, попробуйте позже.",
-            reply_markup=MAIN_KEYBOARD
+        await reply_main(
+            update.message,
+            "Произошла ошибка при подготовке дневника для скачивания. Пожалуйста, попробуйте позже."
         )
 
     return ConversationHandler.END
@@ -13,10 +13,10 @@ from telegram.ext import (
 )
 
 from src.data.storage import get_user_entries
-from src.utils.keyboards import MAIN_KEYBOARD
+from src.utils.keyboards import MAIN_KEYBOARD, reply_main
 from src.visualization.charts import create_time_series_chart, create_correlation_matrix
 from src.visualization.heatmaps import create_monthly_heatmap, create_mood_distribution
-from src.utils.formatters import get_column_name
+from src.utils.formatters import get_column_name, NO_ENTRIES_MESSAGE
 from src.handlers.basic import cancel
 
 # Настройка логгирования
@@ -43,16 +43,13 @@ async def start_visualization(update: Update, context: ContextTypes.DEFAULT_TYPE
         int: следующее состояние диалога (SELECT_CHART_TYPE)
     """
     chat_id = update.effective_chat.id
-    logger.info(f"Пользователь {chat_id} начал процесс визуализации")
+    logger.info("Пользователь %s начал процесс визуализации", chat_id)
 
     # Проверка наличия записей у пользователя
     entries = get_user_entries(chat_id)
 
     if not entries:
-        await update.message.reply_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
-            reply_markup=MAIN_KEYBOARD
-        )
+        await reply_main(update.message, NO_ENTRIES_MESSAGE)
         return ConversationHandler.END
 
     # Создаем клавиатуру для выбора типа графика
@@ -90,7 +87,7 @@ async def select_chart_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chart_type = query.data
 
     # Логирование для отладки
-    logger.info(f"Пользователь {chat_id} выбрал тип графика: {chart_type}")
+    logger.info("Пользователь %s выбрал тип графика: %s", chat_id, chart_type)
 
     # Сохраняем выбранный тип графика
     context.user_data['chart_type'] = chart_type
@@ -194,7 +191,7 @@ async def select_metric(update: Update, context: ContextTypes.DEFAULT_TYPE):
     metric = query.data
 
     # Логирование для отладки
-    logger.info(f"Пользователь {chat_id} выбрал метрику: {metric}")
+    logger.info("Пользователь %s выбрал метрику: %s", chat_id, metric)
 
     # Сохраняем выбранную метрику
     context.user_data['metric'] = metric
@@ -251,7 +248,7 @@ async def select_period(update: Update, context: ContextTypes.DEFAULT_TYPE):
     year, month = query.data.split("_")
 
     # Логирование для отладки
-    logger.info(f"Пользователь {chat_id} выбрал период: год={year}, месяц={month}")
+    logger.info("Пользователь %s выбрал период: год=%s, месяц=%s", chat_id, year, month)
 
     # Генерация календаря настроения
     metric = context.user_data.get('metric')
@@ -274,7 +271,7 @@ async def generate_time_series_chart(message, chat_id: int, metric: str):
 
     if not entries:
         await message.edit_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
+            NO_ENTRIES_MESSAGE,
             reply_markup=None
         )
         return
@@ -304,7 +301,7 @@ async def generate_time_series_chart(message, chat_id: int, metric: str):
         await message.delete()
 
     except Exception as e:
-        logger.error(f"Ошибка при генерации графика временного ряда: {e}")
+        logger.error("Ошибка при генерации графика временного ряда: %s", e)
         await message.edit_text(
             f"Произошла ошибка при генерации графика: {str(e)}",
             reply_markup=None
@@ -325,7 +322,7 @@ async def generate_distribution_chart(message, chat_id: int, metric: str):
 
     if not entries:
         await message.edit_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
+            NO_ENTRIES_MESSAGE,
             reply_markup=None
         )
         return
@@ -355,7 +352,7 @@ async def generate_distribution_chart(message, chat_id: int, metric: str):
         await message.delete()
 
     except Exception as e:
-        logger.error(f"Ошибка при генерации графика распределения: {e}")
+        logger.error("Ошибка при генерации графика распределения: %s", e)
         await message.edit_text(
             f"Произошла ошибка при генерации графика: {str(e)}",
             reply_markup=None
@@ -376,7 +373,7 @@ async def generate_correlation_chart(message, chat_id: int):
     if not entries:
         # When editing a message that had an inline keyboard, we need to provide a new keyboard or None
         await message.edit_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
+            NO_ENTRIES_MESSAGE,
             reply_markup=None  # Explicitly set to None to remove the keyboard
         )
         return
@@ -424,7 +421,7 @@ async def generate_correlation_chart(message, chat_id: int):
                 pass
 
     except Exception as e:
-        logger.error(f"Ошибка при генерации матрицы корреляции: {e}")
+        logger.error("Ошибка при генерации матрицы корреляции: %s", e)
         await message.edit_text(
             f"Произошла ошибка при генерации матрицы корреляции: {str(e)}",
             reply_markup=None  # Explicitly set to None to remove the keyboard
@@ -447,7 +444,7 @@ async def generate_calendar_chart(message, chat_id: int, metric: str, year: int,
 
     if not entries:
         await message.edit_text(
-            "У вас еще нет записей в дневнике или не удалось расшифровать данные.",
+            NO_ENTRIES_MESSAGE,
             reply_markup=None
         )
         return
@@ -477,7 +474,7 @@ async def generate_calendar_chart(message, chat_id: int, metric: str, year: int,
         await message.delete()
 
     except Exception as e:
-        logger.error(f"Ошибка при генерации календаря настроения: {e}")
+        logger.error("Ошибка при генерации календаря настроения: %s", e)
         await message.edit_text(
             f"Произошла ошибка при генерации календаря: {str(e)}",
             reply_markup=None
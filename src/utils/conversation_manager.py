@@ -27,7 +27,7 @@ def register_conversation(chat_id: int, handler_name: str, state: Any) -> None:
         active_conversations[chat_id] = {}
 
     active_conversations[chat_id][handler_name] = state
-    logger.info(f"Зарегистрирован диалог {handler_name} для пользователя {chat_id}, состояние: {state}")
+    logger.info("Зарегистрирован диалог %s для пользователя %s, состояние: %s", handler_name, chat_id, state)
 
 
 def end_conversation(chat_id: int, handler_name: str) -> None:
@@ -40,13 +40,13 @@ def end_conversation(chat_id: int, handler_name: str) -> None:
     """
     if chat_id in active_conversations and handler_name in active_conversations[chat_id]:
         del active_conversations[chat_id][handler_name]
-        logger.info(f"Завершен диалог {handler_name} для пользователя {chat_id}")
+        logger.info("Завершен диалог %s для пользователя %s", handler_name, chat_id)
 
         # Удаляем пользователя из словаря, если у него не осталось активных диалогов
         if not active_conversations[chat_id]:
             del active_conversations[chat_id]
     else:
-        logger.warning(f"Попытка завершить несуществующий диалог {handler_name} для пользователя {chat_id}")
+        logger.warning("Попытка завершить несуществующий диалог %s для пользователя %s", handler_name, chat_id)
 
 
 def end_all_conversations(chat_id: int) -> Set[str]:
@@ -63,10 +63,10 @@ def end_all_conversations(chat_id: int) -> Set[str]:
 
     if chat_id in active_conversations:
         ended_handlers = set(active_conversations[chat_id].keys())
-        logger.info(f"Завершаем все диалоги для пользователя {chat_id}: {ended_handlers}")
+        logger.info("Завершаем все диалоги для пользователя %s: %s", chat_id, ended_handlers)
         del active_conversations[chat_id]
     else:
-        logger.info(f"У пользователя {chat_id} нет активных диалогов для завершения")
+        logger.info("У пользователя %s нет активных диалогов для завершения", chat_id)
 
     return ended_handlers
 
@@ -82,7 +82,7 @@ def get_active_conversations(chat_id: int) -> Dict[str, Any]:
         Dict[str, Any]: словарь активных диалогов {handler_name: state}
     """
     conversations = active_conversations.get(chat_id, {})
-    logger.debug(f"Активные диалоги пользователя {chat_id}: {conversations}")
+    logger.debug("Активные диалоги пользователя %s: %s", chat_id, conversations)
     return conversations
 
 
@@ -98,7 +98,7 @@ def is_conversation_active(chat_id: int, handler_name: str) -> bool:
         bool: True, если диалог активен
     """
     is_active = chat_id in active_conversations and handler_name in active_conversations[chat_id]
-    logger.debug(f"Диалог {handler_name} для пользователя {chat_id} активен: {is_active}")
+    logger.debug("Диалог %s для пользователя %s активен: %s", handler_name, chat_id, is_active)
     return is_active
 
 
@@ -113,7 +113,7 @@ def has_active_conversations(chat_id: int) -> bool:
         bool: True, если у пользователя есть активные диалоги
     """
     has_conversations = chat_id in active_conversations and bool(active_conversations[chat_id])
-    logger.debug(f"У пользователя {chat_id} есть активные диалоги: {has_conversations}")
+    logger.debug("У пользователя %s есть активные диалоги: %s", chat_id, has_conversations)
     return has_conversations
 
 
@@ -121,4 +121,4 @@ def dump_all_conversations() -> None:
     """
     Выводит в лог все активные диалоги для отладки.
     """
-    logger.info(f"Все активные диалоги: {active_conversations}")
\ No newline at end of file
+    logger.info("Все активные диалоги: %s", active_conversations)
\ No newline at end of file
@@ -3,9 +3,12 @@
 """
 
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from src.utils.date_helpers import format_date
 
+# Ответ обработчиков пользователю без записей (или с нерасшифровываемыми записями)
+NO_ENTRIES_MESSAGE = "У вас еще нет записей в дневнике или не удалось расшифровать данные."
+
 
 def format_entry_summary(entry: Dict[str, Any]) -> str:
     """
@@ -143,13 +146,16 @@ def _format_single_entry(entry: Dict[str, Any]) -> str:
     return result
 
 
-def format_entry_list(entries: List[Dict[str, Any]], max_entries: int = 5) -> str:
+def format_entry_list(entries: List[Dict[str, Any]], max_entries: int = 5,
+                      total_count: Optional[int] = None) -> str:
     """
     Форматирует список последних записей для вывода пользователю.
 
     Args:
         entries: список записей для форматирования
         max_entries: максимальное количество записей для отображения
+        total_count: общее количество записей пользователя, если передана
+            только их часть (по умолчанию len(entries))
 
     Returns:
         str: форматированный список записей
@@ -176,7 +182,10 @@ def format_entry_list(entries: List[Dict[str, Any]], max_entries: int = 5) -> st
             # В случае проблем с форматированием отдельной записи, пропускаем ее
             continue
 
-    if len(sorted_entries) > max_entries:
-        result += f"\nИ еще {len(sorted_entries) - max_entries} записей. Используйте /download для выгрузки всего дневника."
+    if total_count is None:
+        total_count = len(sorted_entries)
+
+    if total_count > len(display_entries):
+        result += f"\nИ еще {total_count - len(display_entries)} записей. Используйте /download для выгрузки всего дневника."
 
     return result
\ No newline at end of file
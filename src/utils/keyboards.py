@@ -19,6 +19,22 @@ MAIN_KEYBOARD = ReplyKeyboardMarkup([
 ], resize_keyboard=True, is_persistent=True)
 
 
+async def reply_main(message, text: str, **kwargs):
+    """
+    Отвечает на сообщение, показывая основную клавиатуру.
+    Единая точка для ответов с MAIN_KEYBOARD.
+
+    Args:
+        message: сообщение Telegram, на которое нужно ответить
+        text: текст ответа
+        **kwargs: дополнительные параметры reply_text
+
+    Returns:
+        Message: отправленное сообщение
+    """
+    return await message.reply_text(text, reply_markup=MAIN_KEYBOARD, **kwargs)
+
+
 def get_date_range_keyboard(prefix=""):
     """
     Создает inline-клавиатуру для выбора диапазона дат.
@@ -13,6 +13,32 @@ from unittest.mock import patch, MagicMock
 # Add the src directory to the path so tests can import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+# Test runs must not write into the repository: the database lives in a
+# temporary DATA_FOLDER. The variable is set before src.config is imported
+# by any test module, so storage.DB_FILE points there from the start.
+TEST_DATA_FOLDER = tempfile.mkdtemp(prefix="mindvue_test_data_")
+os.environ['DATA_FOLDER'] = TEST_DATA_FOLDER
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Remove the temporary data folder after the test session."""
+    shutil.rmtree(TEST_DATA_FOLDER, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_visualization_cache(tmp_path_factory):
+    """Write generated charts to a temporary directory instead of the repository."""
+    cache_dir = str(tmp_path_factory.mktemp("visualization_cache"))
+    patchers = [
+        patch('src.visualization.charts.CACHE_DIR', cache_dir),
+        patch('src.visualization.heatmaps.CACHE_DIR', cache_dir),
+    ]
+    for patcher in patchers:
+        patcher.start()
+    yield cache_dir
+    for patcher in patchers:
+        patcher.stop()
+
 @pytest.fixture
 def sample_entry():
     """Sample entry data for testing."""
@@ -0,0 +1,28 @@
+"""
+Shared helpers for handler unit tests.
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+
+def install_background_tasks(context):
+    """
+    Replace context.application.create_task with a fake that runs the
+    coroutine on the test loop and records the task.
+
+    Args:
+        context: mocked handler context
+
+    Returns:
+        list: scheduled tasks, to be awaited with asyncio.gather in tests
+    """
+    background_tasks = []
+
+    def create_task(coroutine, update=None, name=None):
+        task = asyncio.ensure_future(coroutine)
+        background_tasks.append(task)
+        return task
+
+    context.application.create_task = MagicMock(side_effect=create_task)
+    return background_tasks
@@ -132,6 +132,10 @@ class TestAnalytics(unittest.TestCase):
         self.assertIsInstance(summary, str)
         self.assertTrue(len(summary) > 0)
 
+        # Summary is HTML markup, not Markdown
+        self.assertIn("<b>Аналитика паттернов и инсайты</b>", summary)
+        self.assertNotIn("*", summary)
+
         # Check for insufficient data message with empty entries
         summary_empty = format_analytics_summary(self.empty_entries)
         self.assertIn("Недостаточно данных", summary_empty)
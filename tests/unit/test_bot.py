@@ -146,7 +146,7 @@ class TestBot(unittest.TestCase):
         self.assertEqual(result, src.config.SLEEP)
         
         # Check that the user_data contains the mood value
-        self.assertEqual(context.user_data['entry']['mood'], "8")
+        self.assertEqual(context.user_data['entry']['mood'], 8)
         
         # Mock user's sleep input
         update.message.text = "7"
@@ -158,7 +158,7 @@ class TestBot(unittest.TestCase):
         self.assertEqual(result, src.config.COMMENT)
         
         # Check that the user_data contains the sleep value
-        self.assertEqual(context.user_data['entry']['sleep'], "7")
+        self.assertEqual(context.user_data['entry']['sleep'], 7)
         
         # Mock user's comment
         update.message.text = "Test comment"
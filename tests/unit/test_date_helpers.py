@@ -55,6 +55,13 @@ class TestDateHelpers(unittest.TestCase):
         today = get_today()
         self.assertEqual(today, "2023-05-15")
 
+    def test_get_today_changes_with_day(self):
+        """Test that the date string follows the calendar day."""
+        with freeze_time("2023-05-15 23:59:59"):
+            self.assertEqual(get_today(), "2023-05-15")
+        with freeze_time("2023-05-16 00:00:01"):
+            self.assertEqual(get_today(), "2023-05-16")
+
     def test_is_valid_time_format(self):
         """Test validation of time format strings."""
         # Valid time formats
@@ -127,6 +127,11 @@ class TestFormatters(unittest.TestCase):
         self.assertIn("Последние 2 записей", limited_list)
         self.assertIn("И еще 1 записей", limited_list)
 
+        # Partial list with the total count known separately
+        partial_list = format_entry_list(self.multiple_entries[:2], max_entries=2, total_count=10)
+        self.assertIn("Последние 2 записей", partial_list)
+        self.assertIn("И еще 8 записей", partial_list)
+
     def test_get_column_name(self):
         """Test getting localized column names."""
         column_names = [
@@ -0,0 +1,160 @@
+"""
+Tests for analytics handler (/analytics).
+Covers result caching and the empty-diary path.
+"""
+
+import asyncio
+import unittest
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add the src directory to the path so we can import the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.handlers import analytics
+from src.handlers.analytics import analytics_command
+from tests.unit.helpers import install_background_tasks
+
+
+class TestAnalyticsHandler(unittest.IsolatedAsyncioTestCase):
+    """Test cases for /analytics command handler."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.update = MagicMock()
+        self.context = MagicMock()
+
+        self.test_chat_id = 123456789
+        self.update.effective_chat.id = self.test_chat_id
+
+        # reply_text returns the status message with async delete/edit methods
+        self.status_message = MagicMock()
+        self.status_message.delete = AsyncMock()
+        self.status_message.edit_text = AsyncMock()
+
+        self.update.message = MagicMock()
+        self.update.message.reply_text = AsyncMock(return_value=self.status_message)
+
+        self.context.user_data = {}
+
+        # Background tasks are scheduled through the application
+        self.background_tasks = install_background_tasks(self.context)
+
+        self.entries = [
+            {'date': f'2023-01-{day:02d}', 'mood': str(day % 10 + 1)}
+            for day in range(1, 11)
+        ]
+
+        analytics._analytics_cache.clear()
+
+        count_patcher = patch('src.handlers.analytics.count_user_entries', return_value=len(self.entries))
+        self.mock_count = count_patcher.start()
+        self.addCleanup(count_patcher.stop)
+
+    def tearDown(self):
+        """Clean up analytics cache."""
+        analytics._analytics_cache.clear()
+
+    @patch('src.handlers.analytics.format_analytics_summary', return_value="Analytics text")
+    @patch('src.handlers.analytics.get_user_entries')
+    async def test_result_replaces_status_message(self, mock_get_entries, mock_format):
+        """Test that the status message is edited into the result."""
+        mock_get_entries.return_value = self.entries
+
+        await analytics_command(self.update, self.context)
+
+        # Only the status message is sent; the result is an edit of it
+        self.update.message.reply_text.assert_called_once()
+        self.status_message.delete.assert_not_called()
+        self.status_message.edit_text.assert_called_once()
+        self.assertEqual(self.status_message.edit_text.call_args[0][0], "Analytics text")
+
+    @patch('src.handlers.analytics.format_analytics_summary', return_value="Analytics text")
+    @patch('src.handlers.analytics.get_user_entries')
+    async def test_repeated_request_uses_cache(self, mock_get_entries, mock_format):
+        """Test that unchanged entries are not analysed twice."""
+        mock_get_entries.return_value = self.entries
+
+        await analytics_command(self.update, self.context)
+        await analytics_command(self.update, self.context)
+
+        mock_format.assert_called_once_with(self.entries)
+
+    @patch('src.handlers.analytics.format_analytics_summary', return_value="Analytics text")
+    @patch('src.handlers.analytics.get_user_entries')
+    async def test_changed_entries_invalidate_cache(self, mock_get_entries, mock_format):
+        """Test that a changed diary triggers a new analysis."""
+        mock_get_entries.return_value = self.entries
+        await analytics_command(self.update, self.context)
+
+        changed_entries = [dict(entry) for entry in self.entries]
+        changed_entries[0]['mood'] = '1'
+        mock_get_entries.return_value = changed_entries
+        await analytics_command(self.update, self.context)
+
+        self.assertEqual(mock_format.call_count, 2)
+
+    @patch('src.handlers.analytics.format_analytics_summary', return_value="Analytics text")
+    @patch('src.handlers.analytics.get_user_entries')
+    async def test_expired_cache_is_recomputed(self, mock_get_entries, mock_format):
+        """Test that results older than the TTL are recomputed."""
+        mock_get_entries.return_value = self.entries
+
+        with patch('src.handlers.analytics.time.monotonic', return_value=1000.0):
+            await analytics_command(self.update, self.context)
+
+        expired_time = 1000.0 + analytics.ANALYTICS_CACHE_TTL + 1
+        with patch('src.handlers.analytics.time.monotonic', return_value=expired_time):
+            await analytics_command(self.update, self.context)
+
+        self.assertEqual(mock_format.call_count, 2)
+
+    @patch('src.handlers.analytics.format_analytics_summary')
+    @patch('src.handlers.analytics.get_user_entries')
+    async def test_no_entries(self, mock_get_entries, mock_format):
+        """Test that an empty diary is answered without a status message."""
+        self.mock_count.return_value = 0
+
+        await analytics_command(self.update, self.context)
+
+        mock_get_entries.assert_not_called()
+        mock_format.assert_not_called()
+
+        # Single reply, no status message
+        self.update.message.reply_text.assert_called_once()
+        message_text = self.update.message.reply_text.call_args[0][0]
+        self.assertIn("нет записей", message_text.lower())
+
+    @patch('src.handlers.analytics.format_analytics_summary')
+    @patch('src.handlers.analytics.get_user_entries', return_value=[])
+    async def test_undecryptable_entries(self, mock_get_entries, mock_format):
+        """Test /analytics when entries exist but none could be decrypted."""
+        await analytics_command(self.update, self.context)
+
+        mock_format.assert_not_called()
+
+        message_text = self.update.message.reply_text.call_args[0][0]
+        self.assertIn("нет записей", message_text.lower())
+
+        await asyncio.gather(*self.background_tasks)
+        self.status_message.delete.assert_called_once()
+
+    @patch('src.handlers.analytics.format_analytics_summary', side_effect=Exception("boom"))
+    @patch('src.handlers.analytics.get_user_entries')
+    async def test_error_deletes_status_in_background(self, mock_get_entries, mock_format):
+        """Test that the error reply does not wait for status deletion."""
+        mock_get_entries.return_value = self.entries
+
+        await analytics_command(self.update, self.context)
+
+        message_text = self.update.message.reply_text.call_args[0][0]
+        self.assertIn("ошибка", message_text.lower())
+
+        # Deletion runs as a background task
+        await asyncio.gather(*self.background_tasks)
+        self.status_message.delete.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
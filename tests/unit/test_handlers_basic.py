@@ -3,6 +3,7 @@ Tests for basic handlers (start, help, cancel, get_user_id, recent_entries).
 Critical for user interaction and bot UX.
 """
 
+import asyncio
 import unittest
 import os
 import sys
@@ -11,10 +12,13 @@ from unittest.mock import AsyncMock, MagicMock, patch, call
 # Add the src directory to the path so we can import the modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.handlers import basic
 from src.handlers.basic import (
     start, help_command, handle_help_callback,
     get_user_id, cancel, recent_entries
 )
+from telegram.error import BadRequest
+from tests.unit.helpers import install_background_tasks
 
 
 class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
@@ -43,17 +47,28 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         self.update.callback_query = MagicMock()
         self.update.callback_query.answer = AsyncMock()
         self.update.callback_query.message = MagicMock()
-        self.update.callback_query.message.edit_text = AsyncMock()
+        self.update.callback_query.edit_message_text = AsyncMock()
 
         # Mock user_data
         self.context.user_data = {}
 
+        # Background tasks are scheduled through the application
+        self.background_tasks = install_background_tasks(self.context)
+
+    def _set_help_callback_data(self, data):
+        """Set callback data and the regex match PTB would put into context."""
+        self.update.callback_query.data = data
+        self.context.matches = [basic.HELP_CALLBACK_PATTERN.match(data)]
+
     @patch('src.handlers.basic.save_user')
     @patch('src.handlers.basic.end_all_conversations')
     async def test_start_command_saves_user(self, mock_end_conv, mock_save_user):
         """Test that /start command saves user information."""
         await start(self.update, self.context)
 
+        # save_user runs as a background task
+        await asyncio.gather(*self.background_tasks)
+
         # Verify save_user was called with correct parameters
         mock_save_user.assert_called_once_with(
             self.test_chat_id,
@@ -79,15 +94,31 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         self.assertIn("/help", message_text)
         self.assertIn("/add", message_text)
 
-    @patch('src.handlers.basic.save_user')
     @patch('src.handlers.basic.end_all_conversations')
-    async def test_start_command_ends_conversations(self, mock_end_conv, mock_save_user):
-        """Test that /start command ends all active conversations."""
-        await start(self.update, self.context)
+    async def test_simple_commands_end_conversations_first(self, mock_end_conv):
+        """Test that the group -1 pre-handler ends all active conversations."""
+        await basic._end_conversations_before_command(self.update, self.context)
 
         # Verify end_all_conversations was called
         mock_end_conv.assert_called_once_with(self.test_chat_id)
 
+    def test_register_conversation_ending_handler_runs_first(self):
+        """Test that conversations are ended in a group before the commands."""
+        application = MagicMock()
+
+        basic.register(application)
+
+        pre_handlers = [
+            (args[0], kwargs)
+            for args, kwargs in application.add_handler.call_args_list
+            if kwargs.get('group') == -1
+        ]
+        self.assertEqual(len(pre_handlers), 1)
+        handler, _ = pre_handlers[0]
+        self.assertEqual(handler.commands, frozenset(basic.CONVERSATION_ENDING_COMMANDS))
+        # Must block so that it completes before group 0 handlers run
+        self.assertTrue(handler.block)
+
     @patch('src.handlers.basic.end_all_conversations')
     async def test_help_command_sends_categories(self, mock_end_conv):
         """Test that /help command sends category selection."""
@@ -106,17 +137,9 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         # Verify inline keyboard was provided
         self.assertIn('reply_markup', call_args[1])
 
-    @patch('src.handlers.basic.end_all_conversations')
-    async def test_help_command_ends_conversations(self, mock_end_conv):
-        """Test that /help command ends all active conversations."""
-        await help_command(self.update, self.context)
-
-        # Verify end_all_conversations was called
-        mock_end_conv.assert_called_once_with(self.test_chat_id)
-
     async def test_help_callback_data_entry_category(self):
         """Test help callback for data_entry category."""
-        self.update.callback_query.data = "help_data_entry"
+        self._set_help_callback_data("help_data_entry")
 
         await handle_help_callback(self.update, self.context)
 
@@ -124,10 +147,10 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         self.update.callback_query.answer.assert_called_once()
 
         # Verify message was edited
-        self.update.callback_query.message.edit_text.assert_called_once()
+        self.update.callback_query.edit_message_text.assert_called_once()
 
         # Verify response contains data entry commands
-        call_args = self.update.callback_query.message.edit_text.call_args
+        call_args = self.update.callback_query.edit_message_text.call_args
         response_text = call_args[0][0]
 
         self.assertIn("/add", response_text)
@@ -135,12 +158,12 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
 
     async def test_help_callback_analytics_category(self):
         """Test help callback for analytics category."""
-        self.update.callback_query.data = "help_analytics"
+        self._set_help_callback_data("help_analytics")
 
         await handle_help_callback(self.update, self.context)
 
         # Verify response contains analytics commands
-        call_args = self.update.callback_query.message.edit_text.call_args
+        call_args = self.update.callback_query.edit_message_text.call_args
         response_text = call_args[0][0]
 
         self.assertIn("/stats", response_text)
@@ -149,7 +172,8 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
 
     async def test_help_callback_close(self):
         """Test help callback for close action."""
-        self.update.callback_query.data = "help_close"
+        self._set_help_callback_data("help_close")
+        self.update.callback_query.message.delete = AsyncMock()
 
         await handle_help_callback(self.update, self.context)
 
@@ -159,9 +183,19 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         # Verify message was deleted
         self.update.callback_query.message.delete.assert_called_once()
 
+    async def test_help_callback_answer_error_does_not_block_edit(self):
+        """Test that a failed callback answer is logged and the edit still happens."""
+        self._set_help_callback_data("help_analytics")
+        self.update.callback_query.answer.side_effect = Exception("query is too old")
+
+        with self.assertLogs('src.handlers.basic', level='WARNING'):
+            await handle_help_callback(self.update, self.context)
+
+        self.update.callback_query.edit_message_text.assert_called_once()
+
     async def test_help_callback_back(self):
         """Test help callback for back action."""
-        self.update.callback_query.data = "help_back"
+        self._set_help_callback_data("help_back")
 
         await handle_help_callback(self.update, self.context)
 
@@ -169,7 +203,7 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         self.update.callback_query.answer.assert_called_once()
 
         # Verify message was edited with categories
-        call_args = self.update.callback_query.message.edit_text.call_args
+        call_args = self.update.callback_query.edit_message_text.call_args
         response_text = call_args[0][0]
 
         self.assertIn("Справка", response_text)
@@ -190,18 +224,9 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         self.assertIn(str(self.test_chat_id), message_text)
         self.assertIn("ID", message_text)
 
-    @patch('src.handlers.basic.end_all_conversations')
-    async def test_get_user_id_ends_conversations(self, mock_end_conv):
-        """Test that /id command ends all active conversations."""
-        await get_user_id(self.update, self.context)
-
-        # Verify end_all_conversations was called
-        mock_end_conv.assert_called_once_with(self.test_chat_id)
-
-    @patch('src.handlers.basic.has_active_conversations', return_value=True)
     @patch('src.handlers.basic.end_all_conversations', return_value=["some_conversation"])
     @patch('src.handlers.basic.dump_all_conversations')
-    async def test_cancel_with_active_conversations(self, mock_dump, mock_end, mock_has_active):
+    async def test_cancel_with_active_conversations(self, mock_dump, mock_end):
         """Test /cancel command with active conversations."""
         result = await cancel(self.update, self.context)
 
@@ -222,10 +247,9 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         from telegram.ext import ConversationHandler
         self.assertEqual(result, ConversationHandler.END)
 
-    @patch('src.handlers.basic.has_active_conversations', return_value=False)
     @patch('src.handlers.basic.end_all_conversations', return_value=[])
     @patch('src.handlers.basic.dump_all_conversations')
-    async def test_cancel_without_active_conversations(self, mock_dump, mock_end, mock_has_active):
+    async def test_cancel_without_active_conversations(self, mock_dump, mock_end):
         """Test /cancel command without active conversations."""
         await cancel(self.update, self.context)
 
@@ -235,29 +259,44 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
 
         self.assertIn("Нет активных команд", message_text)
 
-    @patch('src.handlers.basic.get_user_entries', return_value=[
+    @patch('src.handlers.basic.end_all_conversations', return_value=[])
+    @patch('src.handlers.basic.dump_all_conversations')
+    async def test_cancel_dumps_conversations_only_in_debug(self, mock_dump, mock_end):
+        """Test that the conversation dump runs only when DEBUG logging is enabled."""
+        with patch.object(basic.logger, 'isEnabledFor', return_value=False):
+            await cancel(self.update, self.context)
+        mock_dump.assert_not_called()
+
+        with patch.object(basic.logger, 'isEnabledFor', return_value=True):
+            await cancel(self.update, self.context)
+        self.assertEqual(mock_dump.call_count, 2)
+
+    @patch('src.handlers.basic.count_user_entries', return_value=12)
+    @patch('src.handlers.basic.get_recent_entries', return_value=[
         {'date': '2023-01-03', 'mood': '8'},
         {'date': '2023-01-02', 'mood': '7'},
         {'date': '2023-01-01', 'mood': '9'}
     ])
     @patch('src.handlers.basic.format_entry_list')
     @patch('src.handlers.basic.end_all_conversations')
-    async def test_recent_entries_with_data(self, mock_end_conv, mock_format, mock_get_entries):
+    async def test_recent_entries_with_data(self, mock_end_conv, mock_format, mock_get_entries, mock_count):
         """Test /recent command with existing entries."""
         mock_format.return_value = "Formatted entries"
 
         await recent_entries(self.update, self.context)
 
-        # Verify get_user_entries was called
-        mock_get_entries.assert_called_once_with(self.test_chat_id)
+        # Verify only the recent entries were requested
+        mock_get_entries.assert_called_once_with(self.test_chat_id, basic.RECENT_ENTRIES_LIMIT)
 
-        # Verify format_entry_list was called
-        mock_format.assert_called_once()
+        # Verify format_entry_list received the total count
+        mock_format.assert_called_once_with(
+            mock_get_entries.return_value, basic.RECENT_ENTRIES_LIMIT, total_count=12
+        )
 
         # Verify message was sent
         self.update.message.reply_text.assert_called_once()
 
-    @patch('src.handlers.basic.get_user_entries', return_value=[])
+    @patch('src.handlers.basic.get_recent_entries', return_value=[])
     @patch('src.handlers.basic.end_all_conversations')
     async def test_recent_entries_without_data(self, mock_end_conv, mock_get_entries):
         """Test /recent command with no entries."""
@@ -273,20 +312,168 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
     @patch('src.handlers.basic.end_all_conversations')
     async def test_start_command_handles_save_error(self, mock_end_conv, mock_save_user):
         """Test that /start command handles save_user errors gracefully."""
-        # Should not crash even if save_user fails
-        try:
-            await start(self.update, self.context)
-            # If it doesn't crash, the exception was handled
-            failed = False
-        except Exception:
-            failed = True
+        # save_user runs in the background, so its failure must not break /start
+        await start(self.update, self.context)
+
+        # The failure surfaces in the application task, where PTB passes it to error handlers
+        self.context.application.create_task.assert_called_once()
+        self.assertIs(self.context.application.create_task.call_args.kwargs['update'], self.update)
+        results = await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        self.assertIsInstance(results[0], Exception)
+        mock_save_user.assert_called_once()
+
+        # Welcome message is still sent
+        self.update.message.reply_text.assert_called_once()
+
+    async def test_help_category_callbacks_show_their_text(self):
+        """Test that each per-category callback edits in its own text."""
+        for category, text in basic.HELP_CATEGORY_TEXTS.items():
+            with self.subTest(category=category):
+                query = MagicMock()
+                query.answer = AsyncMock()
+                query.edit_message_text = AsyncMock()
+                self.update.callback_query = query
+
+                callback = basic._make_help_category_callback(category)
+                await callback(self.update, self.context)
+
+                query.answer.assert_called_once()
+                query.edit_message_text.assert_called_once_with(
+                    text, reply_markup=basic.HELP_BACK_MARKUP
+                )
+
+    async def test_help_back_only_updates_markup_when_text_unchanged(self):
+        """Test that only the keyboard is edited when the text is already shown."""
+        query = self.update.callback_query
+        query.message.text = basic.HELP_HEADER
+        query.message.reply_markup = basic.HELP_BACK_MARKUP
+        query.edit_message_reply_markup = AsyncMock()
+
+        await basic.help_back(self.update, self.context)
+
+        query.answer.assert_called_once()
+        query.edit_message_reply_markup.assert_called_once_with(
+            reply_markup=basic.HELP_MAIN_MARKUP
+        )
+        query.edit_message_text.assert_not_called()
+
+    async def test_help_edit_skipped_when_message_unchanged(self):
+        """Test that a no-op edit is not sent to Telegram."""
+        query = self.update.callback_query
+        query.message.text = basic.HELP_HEADER
+        query.message.reply_markup = basic.HELP_MAIN_MARKUP
+        query.edit_message_reply_markup = AsyncMock()
+
+        await basic.help_back(self.update, self.context)
+
+        query.answer.assert_called_once()
+        query.edit_message_reply_markup.assert_not_called()
+        query.edit_message_text.assert_not_called()
+
+    async def test_help_unchanged_message_tolerates_expired_query(self):
+        """Test that answering an expired query on a no-op edit is only logged."""
+        query = self.update.callback_query
+        query.message.text = basic.HELP_HEADER
+        query.message.reply_markup = basic.HELP_MAIN_MARKUP
+        query.answer = AsyncMock(side_effect=BadRequest("Query is too old"))
+
+        await basic.help_back(self.update, self.context)
+
+        query.answer.assert_called_once()
+
+    def test_register_routes_help_actions_to_dedicated_handlers(self):
+        """Test that every help action gets its own callback handler."""
+        application = MagicMock()
+
+        basic.register(application)
+
+        patterns = [
+            handler.pattern.pattern
+            for (handler,), _ in application.add_handler.call_args_list
+            if isinstance(handler, basic.CallbackQueryHandler)
+        ]
+        self.assertIn("^help_back$", patterns)
+        self.assertIn("^help_close$", patterns)
+        for category in basic.HELP_CATEGORY_TEXTS:
+            self.assertIn(f"^help_{category}$", patterns)
+        # Generic fallback is registered last
+        self.assertEqual(patterns[-1], basic.HELP_CALLBACK_PATTERN.pattern)
+
+    def test_help_fallback_pattern_filters_foreign_callbacks(self):
+        """Test that the dispatcher pattern keeps other callbacks away from the fallback."""
+        handler = basic.CallbackQueryHandler(
+            handle_help_callback, pattern=basic.HELP_CALLBACK_PATTERN
+        )
 
-        # We expect it to raise the exception (no try-except in start())
-        self.assertTrue(failed, "start() should propagate exceptions")
+        for data in ("delete_confirm", "other_help_x", "viz_help"):
+            update = MagicMock(spec=basic.Update)
+            update.callback_query.data = data
+            self.assertFalse(handler.check_update(update), data)
+
+        update = MagicMock(spec=basic.Update)
+        update.callback_query.data = f"{basic.HELP_PREFIX}unknown"
+        self.assertTrue(handler.check_update(update))
+
+    def test_register_simple_commands_are_non_blocking(self):
+        """Test that the basic command handlers do not block other updates."""
+        application = MagicMock()
+
+        basic.register(application)
+
+        command_handlers = [
+            handler
+            for (handler,), kwargs in application.add_handler.call_args_list
+            if isinstance(handler, basic.CommandHandler) and 'group' not in kwargs
+        ]
+        self.assertTrue(command_handlers)
+        for handler in command_handlers:
+            with self.subTest(commands=handler.commands):
+                self.assertFalse(handler.block)
+
+    @patch('src.handlers.basic.end_all_conversations')
+    async def test_error_handler_notifies_user_once_per_interval(self, mock_end_conv):
+        """Test that an error storm produces a single error message per chat."""
+        self.context.bot.send_message = AsyncMock()
+        self.context.error = Exception("boom")
+
+        with patch.dict(basic._error_notify_times, clear=True):
+            with patch('src.handlers.basic.time.monotonic', return_value=1000.0):
+                await basic.error_handler(self.update, self.context)
+                await basic.error_handler(self.update, self.context)
+
+            self.context.bot.send_message.assert_called_once()
+            self.assertEqual(mock_end_conv.call_count, 2)
+
+            # After the interval the user is notified again
+            later = 1000.0 + basic.ERROR_NOTIFY_INTERVAL + 1
+            with patch('src.handlers.basic.time.monotonic', return_value=later):
+                await basic.error_handler(self.update, self.context)
+
+        self.assertEqual(self.context.bot.send_message.call_count, 2)
+
+    async def test_setup_commands_skips_unchanged_commands(self):
+        """Test that set_my_commands is not called when commands are up to date."""
+        application = MagicMock()
+        application.bot.get_my_commands = AsyncMock(return_value=list(basic.BOT_COMMANDS))
+        application.bot.set_my_commands = AsyncMock()
+
+        await basic.setup_commands(application)
+
+        application.bot.set_my_commands.assert_not_called()
+
+    async def test_setup_commands_updates_changed_commands(self):
+        """Test that changed server-side commands are replaced."""
+        application = MagicMock()
+        application.bot.get_my_commands = AsyncMock(return_value=[])
+        application.bot.set_my_commands = AsyncMock()
+
+        await basic.setup_commands(application)
+
+        application.bot.set_my_commands.assert_called_once_with(basic.BOT_COMMANDS)
 
     async def test_help_callback_unknown_category(self):
         """Test help callback with unknown category."""
-        self.update.callback_query.data = "help_unknown_category"
+        self._set_help_callback_data("help_unknown_category")
 
         await handle_help_callback(self.update, self.context)
 
@@ -294,7 +481,7 @@ class TestBasicHandlers(unittest.IsolatedAsyncioTestCase):
         self.update.callback_query.answer.assert_called_once()
 
         # Verify message indicates unknown category
-        call_args = self.update.callback_query.message.edit_text.call_args
+        call_args = self.update.callback_query.edit_message_text.call_args
         response_text = call_args[0][0]
 
         self.assertIn("Неизвестная категория", response_text)
@@ -314,11 +501,14 @@ class TestBasicHandlersEdgeCases(unittest.IsolatedAsyncioTestCase):
         self.update.message.reply_text = AsyncMock()
         self.context.user_data = {}
 
+        self.background_tasks = install_background_tasks(self.context)
+
     @patch('src.handlers.basic.save_user')
     @patch('src.handlers.basic.end_all_conversations')
     async def test_start_with_no_username(self, mock_end_conv, mock_save_user):
         """Test /start command when user has no username."""
         await start(self.update, self.context)
+        await asyncio.gather(*self.background_tasks)
 
         # Verify save_user was called with None username
         mock_save_user.assert_called_once_with(
@@ -332,16 +522,18 @@ class TestBasicHandlersEdgeCases(unittest.IsolatedAsyncioTestCase):
 
     @patch('src.handlers.basic.end_all_conversations')
     async def test_cancel_clears_complex_user_data(self, mock_end_conv):
-        """Test that /cancel clears complex user_data structures."""
-        # Add complex data to user_data
-        self.context.user_data['key1'] = 'value1'
-        self.context.user_data['key2'] = {'nested': 'data'}
-        self.context.user_data['key3'] = [1, 2, 3]
+        """Test that /cancel clears conversation state but keeps other user_data."""
+        # Add complex conversation state to user_data
+        self.context.user_data['entry'] = {'date': '2023-01-01', 'mood': '8'}
+        self.context.user_data['recipient_id'] = 42
+        self.context.user_data['selected_date_range'] = ['2023-01-01', '2023-01-31']
+        # Data that does not belong to any conversation
+        self.context.user_data['key1'] = {'nested': 'data'}
 
         await cancel(self.update, self.context)
 
-        # Verify all data was cleared
-        self.assertEqual(len(self.context.user_data), 0)
+        # Verify only conversation state was cleared
+        self.assertEqual(self.context.user_data, {'key1': {'nested': 'data'}})
 
 
 if __name__ == '__main__':
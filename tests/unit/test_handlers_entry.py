@@ -3,6 +3,7 @@ Tests for entry handlers (add/add_date conversation flows).
 Critical for main user interaction with the bot.
 """
 
+import asyncio
 import unittest
 import os
 import sys
@@ -11,18 +12,20 @@ from unittest.mock import AsyncMock, MagicMock, patch
 # Add the src directory to the path so we can import the modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.handlers import entry
 from src.handlers.entry import (
     start_entry, mood, sleep, comment, balance, mania,
     depression, anxiety, irritability, productivity, sociability,
     custom_cancel, start_entry_with_date, select_date, manual_date_input,
-    custom_cancel_date
+    custom_cancel_date, depression_with_date, HANDLER_DATE_NAME
 )
 from src.config import (
     MOOD, SLEEP, COMMENT, BALANCE, MANIA, DEPRESSION,
     ANXIETY, IRRITABILITY, PRODUCTIVITY, SOCIABILITY,
-    DATE_SELECTION, MANUAL_DATE_INPUT
+    DATE_SELECTION, MANUAL_DATE_INPUT, CONVERSATION_TIMEOUT
 )
 from telegram.ext import ConversationHandler
+from tests.unit.helpers import install_background_tasks
 
 
 class TestEntryHandlersBasic(unittest.IsolatedAsyncioTestCase):
@@ -52,6 +55,9 @@ class TestEntryHandlersBasic(unittest.IsolatedAsyncioTestCase):
         # Mock user_data
         self.context.user_data = {}
 
+        # Background tasks are scheduled through the application
+        self.background_tasks = install_background_tasks(self.context)
+
     @patch('src.handlers.entry.get_user_entries', return_value=[])
     @patch('src.handlers.entry.save_user')
     @patch('src.handlers.entry.end_all_conversations')
@@ -65,7 +71,8 @@ class TestEntryHandlersBasic(unittest.IsolatedAsyncioTestCase):
         mock_end_all.assert_called_once_with(self.test_chat_id)
         mock_register.assert_called_once_with(self.test_chat_id, "entry_handler", MOOD)
 
-        # Verify user was saved
+        # Verify user was saved in the background
+        await asyncio.gather(*self.background_tasks)
         mock_save_user.assert_called_once_with(
             self.test_chat_id,
             self.test_username,
@@ -128,7 +135,7 @@ class TestEntryValidation(unittest.IsolatedAsyncioTestCase):
         result = await mood(self.update, self.context)
 
         # Verify mood was saved
-        self.assertEqual(self.context.user_data['entry']['mood'], "7")
+        self.assertEqual(self.context.user_data['entry']['mood'], 7)
 
         # Verify next question was asked
         self.update.message.reply_text.assert_called_once()
@@ -196,7 +203,7 @@ class TestEntryValidation(unittest.IsolatedAsyncioTestCase):
         result = await sleep(self.update, self.context)
 
         # Verify sleep was saved
-        self.assertEqual(self.context.user_data['entry']['sleep'], "8")
+        self.assertEqual(self.context.user_data['entry']['sleep'], 8)
 
         # Verify next question was asked
         call_args = self.update.message.reply_text.call_args
@@ -214,7 +221,6 @@ class TestEntryValidation(unittest.IsolatedAsyncioTestCase):
             "Bad day",
             "123",
             "Mixed feelings... 🎭",
-            "",  # Empty comment should also be accepted
         ]
 
         for test_comment in test_comments:
@@ -231,6 +237,29 @@ class TestEntryValidation(unittest.IsolatedAsyncioTestCase):
                 # Verify returned state is BALANCE
                 self.assertEqual(result, BALANCE)
 
+    @patch('src.handlers.entry.register_conversation')
+    async def test_comment_is_normalised(self, mock_register):
+        """Test that comments are trimmed, capped, and skipped when empty."""
+        long_comment = "A" * (entry.MAX_COMMENT_LENGTH + 100)
+        cases = [
+            ("  Хороший день \n", "Хороший день"),
+            ("-", None),
+            (" - ", None),
+            ("", None),
+            ("   ", None),
+            (long_comment, "A" * entry.MAX_COMMENT_LENGTH),
+        ]
+
+        for text, expected in cases:
+            with self.subTest(text=text[:20]):
+                self.context.user_data = {'entry': {}}
+                self.update.message.text = text
+
+                result = await comment(self.update, self.context)
+
+                self.assertEqual(self.context.user_data['entry']['comment'], expected)
+                self.assertEqual(result, BALANCE)
+
     @patch('src.handlers.entry.register_conversation')
     async def test_balance_valid_boundary_values(self, mock_register):
         """Test balance handler with boundary values (1 and 10)."""
@@ -242,7 +271,7 @@ class TestEntryValidation(unittest.IsolatedAsyncioTestCase):
                 result = await balance(self.update, self.context)
 
                 # Verify balance was saved
-                self.assertEqual(self.context.user_data['entry']['balance'], value)
+                self.assertEqual(self.context.user_data['entry']['balance'], int(value))
 
                 # Verify returned state is MANIA
                 self.assertEqual(result, MANIA)
@@ -275,6 +304,41 @@ class TestEntryValidation(unittest.IsolatedAsyncioTestCase):
         # Verify returned state is still MOOD
         self.assertEqual(result, MOOD)
 
+    @patch('src.handlers.entry.register_conversation')
+    async def test_numeric_fields_non_ascii_digits(self, mock_register):
+        """Test numeric fields reject digits from other scripts."""
+        for value in ["٥", "５", "05"]:
+            with self.subTest(value=value):
+                self.context.user_data = {'entry': {}}
+                self.update.message.text = value
+
+                result = await mood(self.update, self.context)
+
+                self.assertNotIn('mood', self.context.user_data['entry'])
+                self.assertEqual(result, MOOD)
+
+    @patch('src.handlers.entry.register_conversation')
+    async def test_invalid_input_keeps_conversation_state(self, mock_register):
+        """Test that rejected input does not advance the conversation manager."""
+        self.context.user_data = {'entry': {}}
+        self.update.message.text = "abc"
+
+        await anxiety(self.update, self.context)
+
+        mock_register.assert_not_called()
+
+    @patch('src.handlers.entry.register_conversation')
+    async def test_date_flow_rating_step_uses_date_handler(self, mock_register):
+        """Test that rating steps of the /add_date dialog track the date handler."""
+        self.context.user_data = {'entry': {}}
+        self.update.message.text = "6"
+
+        result = await depression_with_date(self.update, self.context)
+
+        self.assertEqual(self.context.user_data['entry']['depression'], 6)
+        self.assertEqual(result, ANXIETY)
+        mock_register.assert_called_once_with(self.test_chat_id, HANDLER_DATE_NAME, ANXIETY)
+
 
 class TestEntryConversationFlow(unittest.IsolatedAsyncioTestCase):
     """Test complete conversation flow."""
@@ -351,16 +415,16 @@ class TestEntryConversationFlow(unittest.IsolatedAsyncioTestCase):
         mock_save_data.assert_called_once()
         saved_data = mock_save_data.call_args[0][0]
 
-        self.assertEqual(saved_data['mood'], "7")
-        self.assertEqual(saved_data['sleep'], "8")
+        self.assertEqual(saved_data['mood'], 7)
+        self.assertEqual(saved_data['sleep'], 8)
         self.assertEqual(saved_data['comment'], "Good day")
-        self.assertEqual(saved_data['balance'], "6")
-        self.assertEqual(saved_data['mania'], "3")
-        self.assertEqual(saved_data['depression'], "2")
-        self.assertEqual(saved_data['anxiety'], "4")
-        self.assertEqual(saved_data['irritability'], "3")
-        self.assertEqual(saved_data['productivity'], "8")
-        self.assertEqual(saved_data['sociability'], "7")
+        self.assertEqual(saved_data['balance'], 6)
+        self.assertEqual(saved_data['mania'], 3)
+        self.assertEqual(saved_data['depression'], 2)
+        self.assertEqual(saved_data['anxiety'], 4)
+        self.assertEqual(saved_data['irritability'], 3)
+        self.assertEqual(saved_data['productivity'], 8)
+        self.assertEqual(saved_data['sociability'], 7)
 
         # Verify conversation ended
         mock_end_conv.assert_called_once()
@@ -368,6 +432,36 @@ class TestEntryConversationFlow(unittest.IsolatedAsyncioTestCase):
         # Verify returned ConversationHandler.END
         self.assertEqual(result, ConversationHandler.END)
 
+    @patch('src.handlers.entry.check_entry_exists', return_value=False)
+    @patch('src.handlers.entry.format_entry_summary', return_value="Summary")
+    @patch('src.handlers.entry.save_data', return_value=False)
+    @patch('src.handlers.entry.end_conversation')
+    async def test_sociability_save_failure_is_reported(self, mock_end_conv, mock_save_data, mock_format, mock_exists):
+        """Test that the user is told when the entry could not be saved."""
+        self.context.user_data = {'entry': {'date': '2023-01-15'}}
+        self.update.message.text = "7"
+
+        result = await sociability(self.update, self.context)
+
+        mock_save_data.assert_called_once()
+        replies = [call[0][0] for call in self.update.message.reply_text.call_args_list]
+        self.assertEqual(replies[0], "Summary")
+        self.assertIn("не удалось сохранить", replies[1].lower())
+        self.assertEqual(result, ConversationHandler.END)
+
+    @patch('src.handlers.entry.save_data')
+    @patch('src.handlers.entry.end_conversation')
+    async def test_sociability_invalid_input_keeps_conversation(self, mock_end_conv, mock_save_data):
+        """Test that rejected input neither saves nor ends the conversation."""
+        self.context.user_data = {'entry': {'date': '2023-01-15'}}
+        self.update.message.text = "0"
+
+        result = await sociability(self.update, self.context)
+
+        mock_save_data.assert_not_called()
+        mock_end_conv.assert_not_called()
+        self.assertEqual(result, SOCIABILITY)
+
 
 class TestEntryCancel(unittest.IsolatedAsyncioTestCase):
     """Test cancel functionality."""
@@ -410,6 +504,30 @@ class TestEntryCancel(unittest.IsolatedAsyncioTestCase):
         # Verify returned ConversationHandler.END
         self.assertEqual(result, ConversationHandler.END)
 
+    @patch('src.handlers.entry.end_conversation')
+    async def test_timeout_releases_entry_data(self, mock_end_conv):
+        """Test that an idle conversation drops the unfinished entry silently."""
+        self.context.user_data = {'entry': {'date': '2023-01-15', 'mood': 7}}
+        on_timeout = entry._make_timeout_callback(entry.HANDLER_DATE_NAME)
+
+        result = await on_timeout(self.update, self.context)
+
+        self.assertNotIn('entry', self.context.user_data)
+        mock_end_conv.assert_called_once_with(self.test_chat_id, entry.HANDLER_DATE_NAME)
+        self.update.message.reply_text.assert_not_called()
+        self.assertEqual(result, ConversationHandler.END)
+
+    def test_register_sets_conversation_timeout(self):
+        """Test that both entry conversations expire after inactivity."""
+        application = MagicMock()
+        application.handlers = {}
+
+        entry.register(application)
+
+        for handler in (entry.entry_conversation_handler, entry.entry_date_conversation_handler):
+            self.assertEqual(handler.conversation_timeout, CONVERSATION_TIMEOUT)
+            self.assertIn(ConversationHandler.TIMEOUT, handler.states)
+
 
 class TestEntryWithDate(unittest.IsolatedAsyncioTestCase):
     """Test entry with date selection."""
@@ -443,6 +561,9 @@ class TestEntryWithDate(unittest.IsolatedAsyncioTestCase):
 
         self.context.user_data = {}
 
+        # Background tasks are scheduled through the application
+        self.background_tasks = install_background_tasks(self.context)
+
     @patch('src.handlers.entry.save_user')
     @patch('src.handlers.entry.end_all_conversations')
     @patch('src.handlers.entry.register_conversation')
@@ -456,7 +577,8 @@ class TestEntryWithDate(unittest.IsolatedAsyncioTestCase):
 
         # Verify entry was initialized without date
         self.assertIn('entry', self.context.user_data)
-        self.assertNotIn('date', self.context.user_data['entry'])
+        self.assertIsNone(self.context.user_data['entry']['date'])
+        self.assertEqual(tuple(self.context.user_data['entry']), entry.ENTRY_FIELDS)
 
         # Verify returned state is DATE_SELECTION
         self.assertEqual(result, DATE_SELECTION)
@@ -0,0 +1,72 @@
+"""
+Tests for CSV import handler (/import).
+Covers the confirmation step that saves imported entries.
+"""
+
+import unittest
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+
+# Add the src directory to the path so we can import the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.handlers.import_csv import confirm_import
+from telegram.ext import ConversationHandler
+
+
+class TestConfirmImport(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the import confirmation step."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.update = MagicMock()
+        self.context = MagicMock()
+
+        self.test_chat_id = 123456789
+        self.update.effective_chat.id = self.test_chat_id
+
+        self.update.message = MagicMock()
+        self.update.message.reply_text = AsyncMock()
+
+        self.df = pd.DataFrame([{
+            'date': '01.01.2025', 'mood': 7, 'sleep': 6, 'balance': 5,
+            'mania': 1, 'depression': 2, 'anxiety': 3, 'irritability': 4,
+            'productivity': 8, 'sociability': 9, 'comment': 'тест'
+        }])
+        self.context.user_data = {'import_df': self.df, 'import_filename': 'data.csv'}
+
+    @patch('src.handlers.import_csv.end_conversation')
+    @patch('src.handlers.import_csv.save_data', return_value=True)
+    async def test_ratings_saved_as_int(self, mock_save_data, mock_end_conversation):
+        """Imported ratings are stored as int, the same as entries from /add."""
+        self.update.message.text = 'да'
+
+        result = await confirm_import(self.update, self.context)
+
+        self.assertEqual(result, ConversationHandler.END)
+        mock_save_data.assert_called_once()
+        entry, chat_id = mock_save_data.call_args[0]
+        self.assertEqual(chat_id, self.test_chat_id)
+        self.assertEqual(entry['mood'], 7)
+        for field in ('mood', 'sleep', 'balance', 'mania', 'depression',
+                      'anxiety', 'irritability', 'productivity', 'sociability'):
+            self.assertIs(type(entry[field]), int)
+        self.assertEqual(self.context.user_data, {})
+
+    @patch('src.handlers.import_csv.end_conversation')
+    @patch('src.handlers.import_csv.save_data')
+    async def test_declined_import_saves_nothing(self, mock_save_data, mock_end_conversation):
+        """Anything other than confirmation cancels the import."""
+        self.update.message.text = 'нет'
+
+        result = await confirm_import(self.update, self.context)
+
+        self.assertEqual(result, ConversationHandler.END)
+        mock_save_data.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
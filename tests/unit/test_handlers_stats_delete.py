@@ -13,6 +13,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.handlers.stats import stats, download_diary, prepare_csv_from_entries
+from src.handlers import delete
 from src.handlers.delete import delete_command, delete_choice, delete_by_date
 from telegram.ext import ConversationHandler
 
@@ -216,9 +217,9 @@ class TestDeleteHandlers(unittest.IsolatedAsyncioTestCase):
         message_text = call_args[0][0]
         self.assertIn("удален", message_text.lower())  # matches "удаления"
 
-        # Verify keyboard with options was provided
+        # Verify the prebuilt keyboard with options was provided
         keyboard_arg = call_args[1]['reply_markup']
-        self.assertIsNotNone(keyboard_arg)
+        self.assertIs(keyboard_arg, delete.DELETE_MENU_MARKUP)
 
         # Verify returned DELETE_ENTRY_CONFIRM state
         from src.config import DELETE_ENTRY_CONFIRM
@@ -262,9 +263,24 @@ class TestDeleteHandlers(unittest.IsolatedAsyncioTestCase):
         message_text = call_args[0][0]
         self.assertIn("отменено", message_text.lower())
 
+        # Verify the dialog ends with a single API call
+        self.update.callback_query.message.edit_text.assert_called_once()
+        self.update.callback_query.message.reply_text.assert_not_called()
+
         # Verify returned ConversationHandler.END
         self.assertEqual(result, ConversationHandler.END)
 
+    async def test_delete_choice_unknown(self):
+        """Test that an unknown choice ends the conversation."""
+        self.update.callback_query.data = "delete_something"
+        self.update.callback_query.message.reply_text = AsyncMock()
+
+        result = await delete_choice(self.update, self.context)
+
+        message_text = self.update.callback_query.message.edit_text.call_args[0][0]
+        self.assertIn("неизвестная команда", message_text.lower())
+        self.assertEqual(result, ConversationHandler.END)
+
     async def test_delete_choice_by_date(self):
         """Test selecting delete by date option."""
         self.update.callback_query.data = "delete_by_date"
@@ -296,10 +312,46 @@ class TestDeleteHandlers(unittest.IsolatedAsyncioTestCase):
         message_text = call_args[0][0]
         self.assertIn("уверены", message_text.lower())
         self.assertIn("ВСЕ", message_text)
+        self.assertIs(call_args[1]['reply_markup'], delete.DELETE_CONFIRM_ALL_MARKUP)
 
         # Verify returned same state for confirmation
         self.assertIsNotNone(result)
 
+    @patch('src.handlers.delete.delete_entry_by_date', return_value=True)
+    async def test_delete_by_date_valid(self, mock_delete_by_date):
+        """Test deleting an entry for a valid date."""
+        self.update.message.text = " 2023-12-25 "
+
+        result = await delete_by_date(self.update, self.context)
+
+        mock_delete_by_date.assert_called_once_with(self.test_chat_id, "2023-12-25")
+        message_text = self.update.message.reply_text.call_args[0][0]
+        self.assertIn("2023-12-25", message_text)
+        self.assertEqual(result, ConversationHandler.END)
+
+    @patch('src.handlers.delete.delete_entry_by_date')
+    async def test_delete_by_date_invalid(self, mock_delete_by_date):
+        """Test that an invalid date is rejected without deleting."""
+        for date_text in ["25.12.2023", "2023-02-30", "abc", "20231225", "2023-W52-1"]:
+            with self.subTest(date_text=date_text):
+                self.update.message.text = date_text
+
+                result = await delete_by_date(self.update, self.context)
+
+                mock_delete_by_date.assert_not_called()
+                message_text = self.update.message.reply_text.call_args[0][0]
+                self.assertIn("неверный формат", message_text.lower())
+                self.assertEqual(result, ConversationHandler.END)
+
+    def test_delete_callback_pattern(self):
+        """Test that only delete dialog buttons reach delete_choice."""
+        for data in ("delete_all", "delete_by_date", "delete_cancel", "confirm_delete_all"):
+            with self.subTest(data=data):
+                self.assertTrue(delete._is_delete_callback(data))
+
+        for data in ("help_close", "date_yesterday", "undelete_all", None):
+            with self.subTest(data=data):
+                self.assertFalse(delete._is_delete_callback(data))
 
 if __name__ == '__main__':
     unittest.main()
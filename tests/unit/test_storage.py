@@ -3,6 +3,7 @@ import os
 import sys
 import tempfile
 import shutil
+import threading
 import pandas as pd
 from unittest.mock import patch, MagicMock
 
@@ -11,7 +12,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from src.data.storage import (
     save_data, get_user_entries, delete_entry_by_date, 
-    delete_all_entries, has_entry_for_date
+    delete_all_entries, has_entry_for_date, count_user_entries,
+    get_recent_entries, save_user
 )
 import src.config
 
@@ -129,6 +131,33 @@ class TestStorage(unittest.TestCase):
         has_entry = has_entry_for_date(self.test_chat_id, "2023-02-01")
         self.assertFalse(has_entry)
 
+    def test_count_user_entries(self):
+        """Test counting entries without decrypting them."""
+        self.assertEqual(count_user_entries(self.test_chat_id), 0)
+
+        save_data(self.sample_entry, self.test_chat_id)
+        other_entry = self.sample_entry.copy()
+        other_entry["date"] = "2023-02-01"
+        save_data(other_entry, self.test_chat_id)
+
+        self.assertEqual(count_user_entries(self.test_chat_id), 2)
+
+    def test_get_recent_entries(self):
+        """Test that only the newest entries are returned, newest first."""
+        for day in ("2023-01-01", "2023-01-03", "2023-01-02"):
+            entry = self.sample_entry.copy()
+            entry["date"] = day
+            save_data(entry, self.test_chat_id)
+
+        recent = get_recent_entries(self.test_chat_id, 2)
+        self.assertEqual([entry["date"] for entry in recent], ["2023-01-03", "2023-01-02"])
+
+        # Same result when read from the database instead of the cache
+        self.mock_decrypt.side_effect = lambda encrypted_data, chat_id: self.entries_cache[encrypted_data].copy()
+        with patch.dict('src.data.storage._entries_cache', clear=True):
+            recent = get_recent_entries(self.test_chat_id, 2)
+        self.assertEqual([entry["date"] for entry in recent], ["2023-01-03", "2023-01-02"])
+
     def test_delete_entry_by_date(self):
         """Test deleting an entry for a specific date."""
         # Save the sample entry
@@ -182,5 +211,102 @@ class TestStorage(unittest.TestCase):
         entries = get_user_entries(self.test_chat_id)
         self.assertEqual(len(entries), 1)
 
+    def _run_in_threads(self, *targets):
+        """Start every target in its own thread at the same moment and collect results."""
+        barrier = threading.Barrier(len(targets))
+        results = [None] * len(targets)
+
+        def run(index, target):
+            barrier.wait()
+            results[index] = target()
+
+        threads = [threading.Thread(target=run, args=(i, target)) for i, target in enumerate(targets)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_save_user_and_save_data(self):
+        """Writes from worker threads on the shared connection do not lose entries."""
+        chat_ids = []
+        try:
+            # New users every round: the check-then-insert race happens on creation
+            for round_number in range(20):
+                round_ids = [self.test_chat_id + 1000 * (round_number + 1) + i for i in range(10)]
+                chat_ids.extend(round_ids)
+
+                targets = []
+                for chat_id in round_ids:
+                    targets.append(lambda chat_id=chat_id: save_user(chat_id, "user", "User"))
+                    targets.append(lambda chat_id=chat_id: save_data(self.sample_entry, chat_id))
+                self.assertTrue(all(self._run_in_threads(*targets)))
+
+            with patch.dict('src.data.storage._entries_cache', clear=True):
+                for chat_id in chat_ids:
+                    self.assertEqual(count_user_entries(chat_id), 1)
+        finally:
+            for chat_id in chat_ids:
+                delete_all_entries(chat_id)
+
+    def test_concurrent_save_data_from_threads(self):
+        """Entries saved from several worker threads at once all reach the database."""
+        chat_ids = []
+        try:
+            for round_number in range(20):
+                round_ids = [self.test_chat_id + 100000 + 1000 * round_number + i for i in range(10)]
+                chat_ids.extend(round_ids)
+
+                targets = [lambda chat_id=chat_id: save_data(self.sample_entry, chat_id) for chat_id in round_ids]
+                self.assertTrue(all(self._run_in_threads(*targets)))
+
+            with patch.dict('src.data.storage._entries_cache', clear=True):
+                for chat_id in chat_ids:
+                    self.assertEqual(count_user_entries(chat_id), 1)
+        finally:
+            for chat_id in chat_ids:
+                delete_all_entries(chat_id)
+
+    def test_concurrent_save_user_for_same_chat(self):
+        """Repeated /start calls saving the same new user from several threads all succeed."""
+        for round_number in range(50):
+            chat_id = self.test_chat_id + 200000 + round_number
+            results = self._run_in_threads(*[lambda: save_user(chat_id, "user", "User")] * 8)
+            self.assertTrue(all(results))
+
+    def test_concurrent_delete_and_save_data(self):
+        """Deletes running next to another user's save neither fail nor drop that save."""
+        other_entry = self.sample_entry.copy()
+        other_entry["date"] = "2023-02-01"
+        chat_ids = []
+        try:
+            for round_number in range(50):
+                base_id = self.test_chat_id + 300000 + 1000 * round_number
+                by_date_ids = [base_id + i for i in range(4)]
+                all_ids = [base_id + 100 + i for i in range(4)]
+                save_ids = [base_id + 200 + i for i in range(4)]
+                chat_ids.extend(by_date_ids + all_ids + save_ids)
+
+                for chat_id in by_date_ids + all_ids:
+                    save_data(self.sample_entry, chat_id)
+                    save_data(other_entry, chat_id)
+
+                targets = []
+                for by_date_id, all_id, save_id in zip(by_date_ids, all_ids, save_ids):
+                    targets.append(lambda chat_id=by_date_id: delete_entry_by_date(chat_id, "2023-02-01"))
+                    targets.append(lambda chat_id=all_id: delete_all_entries(chat_id))
+                    targets.append(lambda chat_id=save_id: save_data(self.sample_entry, chat_id))
+                self.assertTrue(all(self._run_in_threads(*targets)))
+
+                with patch.dict('src.data.storage._entries_cache', clear=True):
+                    for by_date_id, all_id, save_id in zip(by_date_ids, all_ids, save_ids):
+                        self.assertEqual(count_user_entries(by_date_id), 1)
+                        self.assertEqual(count_user_entries(all_id), 0)
+                        self.assertEqual(count_user_entries(save_id), 1)
+        finally:
+            for chat_id in chat_ids:
+                delete_all_entries(chat_id)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,8 @@
 """Tests for utility modules."""
 import pytest
+import asyncio
 from datetime import datetime, timedelta
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from src.utils.date_helpers import (
     parse_date_range, get_period_name, get_today,
@@ -15,6 +16,7 @@ from src.utils.conversation_manager import (
     register_conversation, end_conversation, end_all_conversations,
     has_active_conversations, is_conversation_active
 )
+from src.utils.keyboards import MAIN_KEYBOARD, reply_main
 
 # Date helpers tests
 @pytest.mark.unit
@@ -169,3 +171,18 @@ def test_conversation_manager():
     assert "handler1" in ended
     assert "handler2" in ended
     assert has_active_conversations(chat_id) is False
+
+
+# Keyboards tests
+@pytest.mark.unit
+def test_reply_main():
+    """Test that reply_main attaches the main keyboard."""
+    message = MagicMock()
+    message.reply_text = AsyncMock(return_value="sent")
+
+    result = asyncio.run(reply_main(message, "Текст", parse_mode="HTML"))
+
+    assert result == "sent"
+    message.reply_text.assert_called_once_with(
+        "Текст", reply_markup=MAIN_KEYBOARD, parse_mode="HTML"
+    )